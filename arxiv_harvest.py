@@ -0,0 +1,349 @@
+import argparse
+import datetime
+import os
+import threading
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+import httpx
+from dotenv import load_dotenv
+import database
+import dedupe
+import http_pool
+import llm_metrics
+import rate_limits
+import scheduler
+import scholar_api
+import topics
+import watermarks
+
+load_dotenv()
+
+# --- CONFIGURATION ---
+# arXiv's OAI-PMH endpoint: whole listings by set, ~1000 records per page
+ARXIV_OAI_URL = os.getenv("ARXIV_OAI_URL", "https://oaipmh.arxiv.org/oai")
+# First harvest of a set: how many days of listings to read
+HARVEST_BOOTSTRAP_DAYS = int(os.getenv("HARVEST_BOOTSTRAP_DAYS", "2"))
+# Listed records first submitted longer ago than this are revisions of old papers
+HARVEST_MAX_AGE_DAYS = int(os.getenv("HARVEST_MAX_AGE_DAYS", "7"))
+# Candidates reviewed per topic and run, on average (spread by scheduler.py)
+HARVEST_CANDIDATES_PER_TOPIC = int(os.getenv("HARVEST_CANDIDATES_PER_TOPIC", "12"))
+# Review batches sent in parallel
+HARVEST_WORKERS = int(os.getenv("HARVEST_WORKERS", "4"))
+# A page cut off mid-stream is requested again this many times
+PAGE_RETRIES = 3
+
+OAI = "{http://www.openarchives.org/OAI/2.0/}"
+ARXIV = "{http://arxiv.org/OAI/arXiv/}"
+# Archives that are OAI sets of their own; every other archive lives under "physics:"
+TOP_LEVEL_SETS = {"cs", "econ", "eess", "math", "q-bio", "q-fin", "stat"}
+
+# Big pages take a while to generate and to stream
+oai_http = http_pool.PooledClient(
+    urlsplit(ARXIV_OAI_URL).netloc,
+    limiter=rate_limits.ARXIV_OAI_BUCKET,
+    backoff_base=5.0,
+    timeout=httpx.Timeout(connect=10.0, read=120.0, write=10.0, pool=10.0),
+    max_connections=1,
+)
+
+
+# --- CATEGORY MAPPING ---
+
+def topics_for(categories):
+    """Scout topics of a paper from its arXiv categories (exact category, else its archive)."""
+    found = []
+    for category in categories:
+        for key in (category, category.split(".")[0]):
+            for topic in topics.ARXIV_CATEGORY_TOPICS.get(key, ()):
+                if topic not in found:
+                    found.append(topic)
+    return found
+
+
+def oai_set(category):
+    """'cs.AI' -> 'cs', 'astro-ph.GA' -> 'physics:astro-ph', 'quant-ph' -> 'physics:quant-ph'."""
+    archive = category.split(".")[0]
+    return archive if archive in TOP_LEVEL_SETS else f"physics:{archive}"
+
+
+def harvest_sets():
+    """The OAI sets covering every mapped category, so one listing serves many topics."""
+    return sorted({oai_set(c) for c in topics.ARXIV_CATEGORY_TOPICS})
+
+
+def harvest_topics():
+    return sorted({t for ts in topics.ARXIV_CATEGORY_TOPICS.values() for t in ts})
+
+
+# --- STREAMING LISTING ---
+
+class ListingError(Exception):
+    """A listing page kept failing, so the set was not read to the end."""
+
+
+def _text(node, tag):
+    child = node.find(f"{ARXIV}{tag}")
+    if child is None or not child.text:
+        return None
+    return " ".join(child.text.split())
+
+
+def _parse_record(record):
+    """An OAI record in the 'arXiv' metadata format -> a Semantic-Scholar-shaped paper (or None)."""
+    header = record.find(f"{OAI}header")
+    if header is None or header.get("status") == "deleted":
+        return None
+    meta = record.find(f"{OAI}metadata/{ARXIV}arXiv")
+    if meta is None:
+        return None
+
+    arxiv_id = _text(meta, "id")
+    doi = _text(meta, "doi")
+    authors = [" ".join(filter(None, (a.findtext(f"{ARXIV}forenames"), a.findtext(f"{ARXIV}keyname"))))
+               for a in meta.iter(f"{ARXIV}author")]
+    return {
+        "arxivId": arxiv_id,
+        "title": _text(meta, "title"),
+        "abstract": _text(meta, "abstract"),
+        "url": f"https://arxiv.org/abs/{arxiv_id}",
+        "openAccessPdf": {"url": f"https://arxiv.org/pdf/{arxiv_id}"},
+        "publicationDate": _text(meta, "created"),
+        "venue": "arXiv Pre-print",
+        "authors": [{"name": name} for name in authors if name],
+        "externalIds": {"ArXiv": arxiv_id, **({"DOI": doi.split()[0]} if doi else {})},
+        "categories": (_text(meta, "categories") or "").split(),
+        "datestamp": header.findtext(f"{OAI}datestamp"),
+    }
+
+
+def _read_page(params, skip):
+    """
+    Requests one listing page and parses it while it downloads, so only
+    the record being parsed is in memory. Yields papers (after the first
+    `skip`), then finally ('token', resumption token or None).
+    """
+    response = oai_http.get(ARXIV_OAI_URL, params=params, stream=True)
+    if response is None:
+        raise httpx.TransportError("no response")
+    try:
+        if response.status_code != 200:
+            raise httpx.HTTPStatusError(f"HTTP {response.status_code}", request=response.request,
+                                        response=response)
+        parser = ET.XMLPullParser(events=("end",))
+        token = None
+        seen = 0
+        for chunk in response.iter_bytes():
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                if elem.tag == f"{OAI}record":
+                    paper = _parse_record(elem)
+                    elem.clear()
+                    seen += 1
+                    if paper and seen > skip:
+                        yield paper
+                elif elem.tag == f"{OAI}resumptionToken":
+                    token = (elem.text or "").strip() or None
+                elif elem.tag == f"{OAI}error" and elem.get("code") != "noRecordsMatch":
+                    print(f"   ❌ OAI error {elem.get('code')}: {elem.text}")
+        parser.close()
+        yield "token", token
+    finally:
+        response.close()
+
+
+def iter_listing(set_spec, since):
+    """
+    Streams every record of an OAI set added or changed since `since`
+    (YYYY-MM-DD), following resumption tokens page by page. A page cut off
+    mid-stream is requested again and resumed after the last record yielded;
+    one that still fails after PAGE_RETRIES raises ListingError, so the
+    caller knows the listing is incomplete.
+    """
+    params = {"verb": "ListRecords", "metadataPrefix": "arXiv", "set": set_spec, "from": since}
+    pages = 0
+    while params:
+        yielded = 0
+        token = None
+        for attempt in range(PAGE_RETRIES + 1):
+            page = _read_page(params, yielded)
+            try:
+                for item in page:
+                    if isinstance(item, tuple):
+                        token = item[1]
+                        break
+                    yielded += 1
+                    yield item
+                break
+            except (httpx.HTTPError, ET.ParseError) as e:
+                if attempt == PAGE_RETRIES:
+                    print(f"   ❌ {set_spec}: page {pages + 1} failed ({e}); stopping this set.")
+                    raise ListingError(f"{set_spec}: page {pages + 1} failed") from e
+                print(f"   ⚠️ {set_spec}: page {pages + 1} interrupted ({e}), retrying...")
+            finally:
+                page.close()
+        pages += 1
+        print(f"   📜 {set_spec}: page {pages} ({yielded} records)")
+        params = {"verb": "ListRecords", "resumptionToken": token} if token else None
+
+
+# --- HARVEST ---
+
+def _since(mark):
+    today = datetime.date.today()
+    if not mark.newest_date:
+        return (today - datetime.timedelta(days=HARVEST_BOOTSTRAP_DAYS)).isoformat()
+    floor = (today - datetime.timedelta(days=watermarks.WATERMARK_MAX_LAG_DAYS)).isoformat()
+    return max(mark.newest_date, floor)
+
+
+class HarvestRun:
+    """Per-run state: topic quotas, papers already considered and counters."""
+
+    def __init__(self, plan, known):
+        self.plan = plan
+        self.quota = dict(plan.allocation)
+        self.known = known
+        self.seen_ids = set()
+        self.counts = {"listed": 0, "revisions": 0, "unmapped": 0, "over_quota": 0,
+                       "known": 0, "candidates": 0, "kept": 0, "unreviewed": 0, "unsaved": 0}
+        self._lock = threading.Lock()
+
+    def consider(self, paper, cutoff):
+        """Returns the paper's topics if it should be reviewed, else None (and counts why)."""
+        self.counts["listed"] += 1
+        if paper["arxivId"] in self.seen_ids:
+            return None
+        self.seen_ids.add(paper["arxivId"])
+        if (paper.get("publicationDate") or "") < cutoff:
+            self.counts["revisions"] += 1
+            return None
+        paper_topics = topics_for(paper["categories"])
+        if not paper_topics or not paper.get("abstract"):
+            self.counts["unmapped"] += 1
+            return None
+        open_topics = [t for t in paper_topics if self.quota.get(t, 0) > 0]
+        if not open_topics:
+            self.counts["over_quota"] += 1
+            return None
+        if self.known.is_known(paper):
+            self.counts["known"] += 1
+            return None
+        for topic in open_topics:
+            self.quota[topic] -= 1
+        self.counts["candidates"] += 1
+        # The topic that pays for the review comes first
+        return open_topics + [t for t in paper_topics if t not in open_topics]
+
+
+def _review_and_save(run, chunk, dry_run):
+    """Reviews one batch of harvested papers and saves the keepers under all their topics."""
+    if dry_run:
+        for paper, paper_topics in chunk:
+            print(f"      🔎 would review for {', '.join(paper_topics)}: {paper['title'][:50]}...")
+        return
+    with llm_metrics.context(entry_point="arxiv_harvest", topic=chunk[0][1][0]):
+        keepers, unreviewed = scholar_api.review_candidates([paper for paper, _ in chunk], 7)
+    topics_by_paper = {id(paper): paper_topics for paper, paper_topics in chunk}
+    entries = [(entry, topics_by_paper[id(paper)]) for paper, entry in keepers]
+    for entry, paper_topics in entries:
+        print(f"      ✅ Keeping for {', '.join(paper_topics)}: {entry['title'][:40]}...")
+    saved_ids = database.save_papers_bulk(entries) if entries else []
+    for entry, _ in entries:
+        run.known.add(entry)
+    with run._lock:
+        run.counts["kept"] += sum(1 for pid in saved_ids if pid)
+        run.counts["unsaved"] += sum(1 for pid in saved_ids if not pid)
+        run.counts["unreviewed"] += unreviewed
+
+
+def harvest(known=None, sets=None, per_topic=HARVEST_CANDIDATES_PER_TOPIC, workers=HARVEST_WORKERS,
+            dry_run=False, budget=None):
+    """
+    Reads the new arXiv listings of every mapped set since the last harvest,
+    maps each paper to scout topics by category, and reviews the unknown
+    ones in batches (spread over topics by past yield, see scheduler.py).
+    Returns the counters of the run.
+    """
+    sets = sets or harvest_sets()
+    topic_list = harvest_topics()
+    plan = scheduler.plan_run(topic_list, per_topic * len(topic_list), budget=budget)
+    if known is None:
+        known = dedupe.load_known_papers(topic_list)
+    run = HarvestRun(plan, known)
+    marks = watermarks.load_all()
+    cutoff = (datetime.date.today() - datetime.timedelta(days=HARVEST_MAX_AGE_DAYS)).isoformat()
+    print(f"🗞️ arXiv harvest: {len(sets)} sets -> {len(topic_list)} topics "
+          f"({sum(plan.allocation.values())} candidates at most)")
+
+    finished = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        running = set()
+        pending = {}
+
+        def submit(topic):
+            running.add(llm_metrics.submit(pool, _review_and_save, run, pending.pop(topic), dry_run))
+            # Backpressure: never read the listing far ahead of the reviews
+            while len(running) >= workers * 2:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.discard(future)
+                    future.result()
+
+        for set_spec in sets:
+            mark = marks.get(f"arxiv:{set_spec}") or watermarks.Watermark(f"arxiv:{set_spec}")
+            # Datestamps are not in order: what was seen is decided by the mark as loaded
+            before = watermarks.Watermark(mark.topic, mark.newest_date, mark.seen_ids)
+            since = _since(mark)
+            print(f"   🌊 Listing {set_spec} since {since}")
+            try:
+                for paper in iter_listing(set_spec, since):
+                    if plan.budget.winding_down():
+                        break
+                    stamp = {"publicationDate": paper["datestamp"], "paperId": paper["arxivId"]}
+                    if not before.is_seen(stamp):
+                        paper_topics = run.consider(paper, cutoff)
+                        if paper_topics:
+                            pending.setdefault(paper_topics[0], []).append((paper, paper_topics))
+                            if len(pending[paper_topics[0]]) >= scholar_api.REVIEW_BATCH_SIZE:
+                                submit(paper_topics[0])
+                    mark.advance(stamp)
+                else:
+                    # Only a listing read to the end may move its watermark
+                    finished.append(mark)
+            except ListingError:
+                # Already reported; the set is listed again from its old watermark next run
+                continue
+
+        for topic in list(pending):
+            submit(topic)
+        for future in running:
+            future.result()
+
+    # Only move the watermarks once every candidate read is reviewed and saved
+    if run.counts["unreviewed"] or run.counts["unsaved"]:
+        print(f"   ⚠️ {run.counts['unreviewed']} papers unreviewed, {run.counts['unsaved']} unsaved: "
+              f"the listings will be read again next run.")
+    elif not dry_run:
+        for mark in finished:
+            watermarks.save(mark)
+    unfinished = len(sets) - len(finished)
+    if unfinished:
+        print(f"   ⚠️ {unfinished} listings were cut short; their watermarks stay put.")
+    print(f"✅ arXiv harvest: {run.counts}")
+    return run.counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Harvest new arXiv listings and review them for the scout topics.")
+    parser.add_argument("--sets", default=None,
+                        help=f"Comma-separated OAI sets (default: {','.join(harvest_sets())})")
+    parser.add_argument("--per-topic", type=int, default=HARVEST_CANDIDATES_PER_TOPIC,
+                        help="Candidates per topic, on average")
+    parser.add_argument("--workers", type=int, default=HARVEST_WORKERS, help="Review batches in parallel")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only list what would be reviewed (no AI calls, no writes)")
+    args = parser.parse_args()
+    harvest(sets=args.sets.split(",") if args.sets else None, per_topic=args.per_topic,
+            workers=args.workers, dry_run=args.dry_run)
+    oai_http.print_stats()
@@ -1,60 +1,68 @@
-import time
 import topics
 import scholar_api
+import review_cache
+import impact_model
 import database
+import backfill_runner
 
 # Initialize DB
 database.init_db()
 
 
-def run_historical_backfill():
-    print("\n" + "="*60)
-    print("📜  STARTING HISTORICAL BACKFILL ENGINE (2015-2024)")
-    print("    Goal: Populate database with 'Hall of Fame' papers")
-    print("="*60 + "\n")
+def backfill_topic(topic, year_start=2015):
+    """Fetches and saves the Hall of Fame papers of one topic. Returns True when done."""
+    print(f"🔭  Scouting Topic: {topic.upper()}...")
 
-    total_added = 0
-    total_topics = len(topics.ALL_TOPICS)
+    # Fetch top 5 most cited papers since year_start
+    classics = scholar_api.get_historical_feed(
+        topic, year_start=year_start, limit=5)
 
-    # Loop through topics with an index so we can show (1/20) etc.
-    for i, topic in enumerate(topics.ALL_TOPICS, 1):
-        print(f"🔭  [{i}/{total_topics}] Scouting Topic: {topic.upper()}...")
+    if classics is None:
+        # Fetch failed: leave the topic out of the checkpoint so the next run retries it
+        print(f"    ❌  [{topic}] Could not read Semantic Scholar; will retry.")
+        return False
+    if not classics:
+        print(f"    ⚠️  [{topic}] No high-impact papers found for this topic.")
+        return True
 
-        try:
-            # Fetch top 5 most cited papers since 2015
-            # We add a small print inside scholar_api usually, but let's be explicit here
-            classics = scholar_api.get_historical_feed(
-                topic, year_start=2015, limit=5)
+    print(f"    ✅  [{topic}] Found {len(classics)} influential papers.")
+    for paper in classics:
+        # Print the title being saved (truncated to fit screen)
+        short_title = (
+            paper['title'][:50] + '..') if len(paper['title']) > 50 else paper['title']
+        print(
+            f"       💾  Saving: {short_title} (Cited: {paper.get('citationCount', '?')})")
 
-            if classics:
-                print(f"    ✅  Found {len(classics)} influential papers.")
+    # Save to DB (one upsert for the whole topic)
+    saved_ids = database.save_papers_bulk([(paper, topic) for paper in classics])
+    return all(saved_ids)
 
-                for paper in classics:
-                    # Print the title being saved (truncated to fit screen)
-                    short_title = (
-                        paper['title'][:50] + '..') if len(paper['title']) > 50 else paper['title']
-                    print(
-                        f"       💾  Saving: {short_title} (Cited: {paper.get('citationCount', '?')})")
 
-                    # Save to DB
-                    database.save_paper(paper, search_topic=topic)
-                    total_added += 1
-            else:
-                print("    ⚠️  No high-impact papers found for this topic.")
+def run_historical_backfill(workers=4, limit=None, year_start=None, restart=False):
+    year_start = year_start or 2015
 
-            # Sleep to respect API limits (important!)
-            print("    💤  Cooling down API (2s)...")
-            time.sleep(2)
-            print("")  # Empty line for spacing
+    print("\n" + "="*60)
+    print(f"📜  STARTING HISTORICAL BACKFILL ENGINE ({year_start}-Present)")
+    print("    Goal: Populate database with 'Hall of Fame' papers")
+    print("="*60 + "\n")
 
-        except Exception as e:
-            print(f"    ❌  ERROR processing {topic}: {e}\n")
+    summary = backfill_runner.run(
+        "historical_backfill",
+        sorted(topics.ALL_TOPICS),
+        lambda topic: backfill_topic(topic, year_start),
+        workers=workers, limit=limit, restart=restart)
 
     print("\n" + "="*60)
     print(f"✅  BACKFILL COMPLETE!")
-    print(f"    📚  Total Papers Added to Library: {total_added}")
+    print(f"    📚  Topics done: {summary['succeeded']} | failed: {summary['failed']} | "
+          f"already done: {summary['skipped']}")
+    review_cache.REVIEWS.print_stats()
+    impact_model.PREFILTER.print_stats()
     print("="*60 + "\n")
 
 
 if __name__ == "__main__":
-    run_historical_backfill()
+    args = backfill_runner.parse_args(
+        "Populate the database with highly cited papers per topic.",
+        since_help=None, year_help="Earliest publication year to consider (default 2015)")
+    run_historical_backfill(args.workers, args.limit, args.year, args.restart)
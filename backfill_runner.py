@@ -0,0 +1,131 @@
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CHECKPOINT_DIR = os.getenv("BACKFILL_CHECKPOINT_DIR", ".cache/checkpoints")
+
+
+def parse_args(description, since_help="Only process items newer than this date (YYYY-MM-DD)",
+               checkpointed=True, year_help=None):
+    """
+    Common command line for every backfill script. Pass `since_help=None`
+    to drop --since, and `year_help` to add --year (a publication year).
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Items processed in parallel")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Process at most this many items in this run")
+    if since_help:
+        parser.add_argument("--since", default=None, help=since_help)
+    if year_help:
+        parser.add_argument("--year", type=int, default=None, help=year_help)
+    if checkpointed:
+        parser.add_argument("--restart", action="store_true",
+                            help="Ignore the checkpoint and start from the first item")
+    return parser.parse_args()
+
+
+class Checkpoint:
+    """
+    Append-only journal of completed item keys (one JSON object per line).
+    A line is only written after its item has fully succeeded, so on restart
+    every journaled item is skipped and everything else is retried.
+    """
+
+    def __init__(self, name, restart=False):
+        os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+        self.path = os.path.join(CHECKPOINT_DIR, f"{name}.jsonl")
+        if restart and os.path.exists(self.path):
+            os.remove(self.path)
+        self.done = self._load()
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _load(self):
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["key"])
+                except (ValueError, KeyError):
+                    # A torn last line from a crash: that item simply runs again
+                    continue
+        return done
+
+    def commit(self, key, **info):
+        with self._lock:
+            self._file.write(json.dumps({"key": key, "ts": time.time(), **info}) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.done.add(key)
+
+    def close(self):
+        self._file.close()
+
+
+def _fmt_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s"
+
+
+def run(name, items, process, key=lambda item: item, workers=4, limit=None, restart=False):
+    """
+    Runs `process(item)` over `items` with a thread pool, journaling each
+    completed item so an interrupted run resumes where it stopped.
+    `process` returns a truthy value on success; falsy or an exception leaves
+    the item un-journaled so the next run retries it.
+    Prints one structured progress line (key=value) per finished item.
+    Returns a summary dict.
+    """
+    checkpoint = Checkpoint(name, restart=restart)
+    items = list(items)
+    todo = [item for item in items if str(key(item)) not in checkpoint.done]
+    skipped = len(items) - len(todo)
+    if limit is not None:
+        todo = todo[:limit]
+
+    print(f"📒 job={name} todo={len(todo)} already_done={skipped} workers={workers} "
+          f"checkpoint={checkpoint.path}")
+
+    succeeded = 0
+    failed = 0
+    started = time.monotonic()
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(process, item): item for item in todo}
+            for finished, future in enumerate(as_completed(futures), 1):
+                item_key = str(key(futures[future]))
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"   ❌ job={name} item={item_key!r} error={e!r}")
+                    result = None
+
+                if result:
+                    checkpoint.commit(item_key)
+                    succeeded += 1
+                else:
+                    failed += 1
+
+                elapsed = time.monotonic() - started
+                rate = finished / elapsed if elapsed else 0.0
+                eta = (len(todo) - finished) / rate if rate else 0.0
+                print(f"📊 job={name} done={finished}/{len(todo)} ok={succeeded} failed={failed} "
+                      f"rate={rate:.2f}/s elapsed={_fmt_duration(elapsed)} eta={_fmt_duration(eta)}")
+    finally:
+        checkpoint.close()
+
+    return {"processed": len(todo), "succeeded": succeeded, "failed": failed,
+            "skipped": skipped, "seconds": round(time.monotonic() - started, 1)}
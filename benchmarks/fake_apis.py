@@ -0,0 +1,273 @@
+"""
+Local stand-ins for Semantic Scholar and Gemini, used by the scout benchmark.
+
+- Semantic Scholar: /paper/search, /paper/search/bulk and /paper/batch.
+  Replays responses recorded with record_fixtures.py when a fixture exists
+  for the query, otherwise serves deterministic synthetic papers.
+- Gemini: models/<model>:generateContent. Answers with a deterministic fake
+  structured review that matches the requested response schema.
+
+Both add a configurable latency and can inject 429s (with Retry-After).
+GET /__stats returns request counters, GET /__reset clears them.
+"""
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture_path(query):
+    slug = re.sub(r"[^a-z0-9]+", "_", query.lower()).strip("_")
+    return os.path.join(FIXTURE_DIR, f"s2_{slug}.json")
+
+
+def _stable_int(text, modulo):
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16) % modulo
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _handle(self, method):
+        api = self.server.api
+        parts = urlsplit(self.path)
+        if parts.path == "/__stats":
+            return self._send(200, api.stats())
+        if parts.path == "/__reset":
+            api.reset()
+            return self._send(200, {})
+
+        body = self._body() if method == "POST" else None
+        if api.should_throttle():
+            return self._send(429, api.throttle_body(), {"Retry-After": str(api.retry_after)})
+        time.sleep(api.latency)
+        status, payload = api.respond(method, parts.path, parse_qs(parts.query), body)
+        self._send(status, payload)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class FakeAPI:
+    """Shared server plumbing: latency, 429 injection, counters."""
+
+    def __init__(self, latency=0.0, throttle_rate=0.0, retry_after=1, seed=7):
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = None
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.throttled = 0
+            self.by_path = {}
+
+    def should_throttle(self):
+        with self._lock:
+            self.requests += 1
+            if self._random.random() < self.throttle_rate:
+                self.throttled += 1
+                return True
+            return False
+
+    def count(self, path):
+        with self._lock:
+            self.by_path[path] = self.by_path.get(path, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "throttled": self.throttled,
+                    "by_path": dict(self.by_path)}
+
+    def throttle_body(self):
+        return {"error": "Too Many Requests"}
+
+    def respond(self, method, path, query, body):
+        raise NotImplementedError
+
+    def start(self, port=0):
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.server.daemon_threads = True
+        self.server.api = self
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeSemanticScholar(FakeAPI):
+    """Serves /graph/v1/paper/search, /paper/search/bulk and /paper/batch."""
+
+    def __init__(self, papers_per_query=200, **kwargs):
+        super().__init__(**kwargs)
+        self.papers_per_query = papers_per_query
+        self._corpora = {}
+
+    @property
+    def base(self):
+        return f"{self.url}/graph/v1"
+
+    def corpus(self, query):
+        """The full result list for a query: recorded fixture, or synthetic."""
+        if query not in self._corpora:
+            path = fixture_path(query)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    papers = json.load(f)["data"]
+            else:
+                papers = [self._synthetic_paper(query, i) for i in range(self.papers_per_query)]
+            self._corpora[query] = papers
+        return self._corpora[query]
+
+    @staticmethod
+    def _synthetic_paper(query, i):
+        pid = hashlib.sha1(f"{query}:{i}".encode()).hexdigest()
+        # A few papers are shared by every query, like real cross-topic hits
+        if i % 25 == 0:
+            pid = hashlib.sha1(f"shared:{i}".encode()).hexdigest()
+        day = 1 + i % 28
+        return {
+            "paperId": pid,
+            "title": f"{query.title()} study {i}: scalable methods for {['sensing', 'control', 'materials', 'inference'][i % 4]}",
+            "abstract": f"We study {query} problem {i}. " + "Results improve the baseline by a measurable margin. " * 6,
+            "url": f"https://www.semanticscholar.org/paper/{pid}",
+            "publicationDate": f"2025-01-{day:02d}",
+            "venue": "Bench Journal",
+            "authors": [{"name": "A. Author"}, {"name": "B. Author"}],
+            "externalIds": {"DOI": f"10.5555/{pid[:12]}"},
+            "openAccessPdf": None,
+            "citationCount": _stable_int(pid, 500),
+        }
+
+    def respond(self, method, path, query, body):
+        self.count(path)
+        q = (query.get("query") or [""])[0]
+        if path.endswith("/paper/search/bulk"):
+            papers = self.corpus(q)
+            start = int((query.get("token") or ["0"])[0])
+            page = papers[start:start + 1000]
+            token = str(start + len(page)) if start + len(page) < len(papers) else None
+            return 200, {"total": len(papers), "token": token, "data": page}
+        if path.endswith("/paper/search"):
+            papers = self.corpus(q)
+            offset = int((query.get("offset") or ["0"])[0])
+            limit = int((query.get("limit") or ["100"])[0])
+            page = papers[offset:offset + limit]
+            result = {"total": len(papers), "offset": offset, "data": page}
+            if offset + len(page) < len(papers):
+                result["next"] = offset + len(page)
+            return 200, result
+        if path.endswith("/paper/batch") and method == "POST":
+            return 200, [{"paperId": pid, "citationCount": _stable_int(pid, 500)}
+                         for pid in body.get("ids", [])]
+        return 404, {"error": f"Unknown path {path}"}
+
+
+PAPER_PATTERN = re.compile(r"\[PAPER (\d+)\]\s*- Title: ([^\n]*)")
+TITLE_PATTERN = re.compile(r"- Title: ([^\n]*)")
+
+
+class FakeGemini(FakeAPI):
+    """Serves models/<model>:generateContent with schema-shaped fake answers."""
+
+    def throttle_body(self):
+        return {"error": {"code": 429, "message": "Resource has been exhausted (e.g. check quota).",
+                          "status": "RESOURCE_EXHAUSTED"}}
+
+    def respond(self, method, path, query, body):
+        self.count("generateContent")
+        prompt = "".join(part.get("text", "")
+                         for content in body.get("contents", [])
+                         for part in content.get("parts", []))
+        config = body.get("generationConfig") or {}
+        schema = config.get("responseSchema") or config.get("responseJsonSchema") or {}
+
+        papers = PAPER_PATTERN.findall(prompt)
+        if not papers:
+            titles = TITLE_PATTERN.findall(prompt)
+            papers = [("0", titles[0] if titles else "")]
+        answer = self._fill(schema, papers)
+        text = json.dumps(answer)
+
+        return 200, {
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]},
+                            "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {"promptTokenCount": len(prompt) // 4,
+                              "candidatesTokenCount": len(text) // 4,
+                              "totalTokenCount": (len(prompt) + len(text)) // 4},
+            "modelVersion": path.rsplit("/", 1)[-1].split(":")[0],
+        }
+
+    def _fill(self, schema, papers):
+        """Builds a value for `schema`. A top-level list of per-paper items gets one item per paper."""
+        props = schema.get("properties") or {}
+        if len(props) == 1:
+            (name, prop), = props.items()
+            items = prop.get("items") or {}
+            if _type(prop) == "array" and "index" in (items.get("properties") or {}):
+                return {name: [self._value(items, int(i), title) for i, title in papers]}
+        index, title = papers[0]
+        return self._value(schema, int(index), title)
+
+    def _value(self, schema, index, title, name=None):
+        kind = _type(schema)
+        if kind == "object":
+            return {key: self._value(prop, index, title, key)
+                    for key, prop in (schema.get("properties") or {}).items()}
+        if kind == "array":
+            return [self._value(schema.get("items") or {}, index, title) for _ in range(3)]
+        if kind == "integer":
+            if name == "index":
+                return index
+            # Deterministic score: about a third of papers are keepers (>= 7)
+            return 1 + _stable_int(title, 10)
+        if kind == "number":
+            return 0.5
+        if kind == "boolean":
+            return False
+        return f"Fake {name or 'text'} for: {title[:40]}"
+
+
+def _type(schema):
+    kind = schema.get("type") or ""
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "")
+    return kind.lower()
@@ -0,0 +1,52 @@
+"""
+Records live Semantic Scholar search results as benchmark fixtures.
+The fake S2 server replays benchmarks/fixtures/s2_<query>.json for a query
+when it exists (and synthesizes papers otherwise).
+
+    python benchmarks/record_fixtures.py --topics 8 --pages 3
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+import scholar_api  # noqa: E402
+import topics  # noqa: E402
+from fake_apis import FIXTURE_DIR, fixture_path  # noqa: E402
+
+FIELDS = "title,abstract,url,publicationDate,venue,authors,paperId,openAccessPdf,externalIds,citationCount"
+
+
+def record(topic, pages, page_size):
+    current_year = datetime.datetime.now().year
+    params = {
+        "query": topic,
+        "year": f"{current_year-1}-{current_year}",
+        "sort": "publicationDate:desc",
+        "fields": FIELDS,
+    }
+    papers = list(scholar_api.iter_semantic_scholar(
+        scholar_api.S2_SEARCH_URL, params, page_size=page_size, max_pages=pages))
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with open(fixture_path(topic), "w", encoding="utf-8") as f:
+        json.dump({"query": topic,
+                   "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                   "data": papers}, f)
+    print(f"💾 {topic}: {len(papers)} papers -> {fixture_path(topic)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record S2 search responses for the benchmark.")
+    parser.add_argument("--topics", type=int, default=8, help="First N topics (sorted), as the benchmark uses")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    for topic in sorted(topics.ALL_TOPICS)[:args.topics]:
+        record(topic, args.pages, args.page_size)
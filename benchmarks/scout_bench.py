@@ -0,0 +1,199 @@
+"""
+Offline throughput benchmark of the scout ingest path
+(fetch -> evaluate -> persist) against the local stand-ins in fake_apis.py.
+
+Every combination of the comma-separated settings runs in a fresh child
+process (clean limiter state, honest peak memory). Persisting goes to an
+in-memory store, so no database is touched.
+
+    python benchmarks/scout_bench.py --evaluate-workers 2,4,8 --review-batch-size 4,8 \
+        --gemini-latency 0.5 --throttle-rate 0.05 > bench_output.txt
+
+Reports papers/minute, API calls per kept paper and peak traced memory.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+# Settings that can be swept (comma-separated on the command line)
+GRID = {
+    "fetch_workers": 4,
+    "evaluate_workers": 4,
+    "persist_workers": 2,
+    "queue_size": 16,
+    "review_batch_size": 8,
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the scout against local fake APIs.")
+    for name, default in GRID.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", default=str(default),
+                            help=f"Comma-separated values to sweep (default {default})")
+    parser.add_argument("--topics", type=int, default=8, help="Number of topics scanned")
+    parser.add_argument("--candidates-per-topic", type=int, default=24)
+    parser.add_argument("--papers-per-query", type=int, default=200,
+                        help="Synthetic results per query when no fixture is recorded")
+    parser.add_argument("--s2-latency", type=float, default=0.05, help="Seconds per S2 request")
+    parser.add_argument("--gemini-latency", type=float, default=0.4, help="Seconds per Gemini request")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Share of requests answered with 429 (both APIs)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After sent with injected 429s")
+    parser.add_argument("--gemini-max-concurrency", type=int, default=8,
+                        help="Ceiling of the adaptive Gemini concurrency limiter")
+    parser.add_argument("--prefilter", default="off", choices=["off", "shadow", "on"])
+    parser.add_argument("--json", action="store_true", help="Print one JSON result per line")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+# --- CHILD: one measured run ---
+
+def run_child(config):
+    sys.path.insert(0, REPO_DIR)
+    import nightly_scout
+    import scheduler
+    import scholar_api
+    import database
+    import dedupe
+    import topics
+
+    # Never touch the real database: keepers go to an in-memory store
+    database._admin_client = None
+    stored = {}
+
+    def save_papers_bulk(entries, access_token=None):
+        ids = []
+        for paper, _ in entries:
+            key = dedupe.paper_key(paper)
+            stored.setdefault(key, len(stored) + 1)
+            ids.append(stored[key])
+        return ids
+
+    database.save_papers_bulk = save_papers_bulk
+    database.add_paper_topics = lambda pid, new_topics, access_token=None: True
+
+    nightly_scout.FETCH_WORKERS = config["fetch_workers"]
+    nightly_scout.EVALUATE_WORKERS = config["evaluate_workers"]
+    nightly_scout.PERSIST_WORKERS = config["persist_workers"]
+    nightly_scout.QUEUE_SIZE = config["queue_size"]
+    scheduler.SCOUT_CANDIDATES_PER_TOPIC = config["candidates_per_topic"]
+    nightly_scout.REPORT_EVERY_SECONDS = 3600
+    scholar_api.REVIEW_BATCH_SIZE = config["review_batch_size"]
+
+    topic_list = sorted(topics.ALL_TOPICS)[:config["topics"]]
+    known = dedupe.KnownPapers()
+
+    tracemalloc.start()
+    started = time.monotonic()
+    saved, scan, registry = asyncio.run(nightly_scout.run_scan(known, topic_list))
+    elapsed = time.monotonic() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": round(elapsed, 2),
+        "papers": len(registry.records),
+        "kept": saved,
+        "peak_mb": round(peak / 2 ** 20, 1),
+        "stages": scan.stats(),
+    }
+
+
+# --- PARENT: servers + sweep ---
+
+def main():
+    args = parse_args()
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child))))
+        return
+
+    sys.path.insert(0, BENCH_DIR)
+    import fake_apis
+
+    s2 = fake_apis.FakeSemanticScholar(papers_per_query=args.papers_per_query, latency=args.s2_latency,
+                                       throttle_rate=args.throttle_rate, retry_after=args.retry_after).start()
+    gemini = fake_apis.FakeGemini(latency=args.gemini_latency, throttle_rate=args.throttle_rate,
+                                  retry_after=args.retry_after).start()
+
+    sweep = {name: [int(v) for v in getattr(args, name).split(",")] for name in GRID}
+    combos = [dict(zip(sweep, values)) for values in itertools.product(*sweep.values())]
+
+    if not args.json:
+        print(f"🏁 Scout benchmark: {len(combos)} configs, {args.topics} topics x "
+              f"{args.candidates_per_topic} candidates | S2 {args.s2_latency}s, "
+              f"Gemini {args.gemini_latency}s, 429 rate {args.throttle_rate:.0%}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   S2_API_BASE=s2.base,
+                   S2_API_KEY="",
+                   GEMINI_BASE_URL=gemini.url,
+                   GOOGLE_API_KEY="bench",
+                   # The stand-ins are the only limit being measured
+                   S2_REQUESTS_PER_SEC="1000", S2_BURST="1000",
+                   GEMINI_REQUESTS_PER_MIN="100000", GEMINI_BURST="1000",
+                   GEMINI_MAX_CONCURRENCY=str(args.gemini_max_concurrency),
+                   REVIEW_CACHE_ENABLED="false",
+                   PREFILTER_MODE=args.prefilter,
+                   WATERMARK_STATE_PATH=os.path.join(tmp, "watermarks.json"),
+                   LLM_METRICS_PATH=os.path.join(tmp, "llm_metrics.jsonl"))
+
+        for combo in combos:
+            config = dict(combo, topics=args.topics, candidates_per_topic=args.candidates_per_topic)
+            for api in (s2, gemini):
+                api.reset()
+            # Each run starts with no watermarks
+            if os.path.exists(env["WATERMARK_STATE_PATH"]):
+                os.remove(env["WATERMARK_STATE_PATH"])
+
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", json.dumps(config)],
+                env=env, cwd=tmp, capture_output=True, text=True)
+            if child.returncode != 0:
+                print(f"❌ {combo}: child failed\n{child.stderr[-2000:]}")
+                continue
+
+            result = json.loads(child.stdout.strip().splitlines()[-1])
+            s2_stats, gemini_stats = s2.stats(), gemini.stats()
+            api_calls = s2_stats["requests"] + gemini_stats["requests"]
+            result.update(
+                config=combo,
+                papers_per_minute=round(result["papers"] / result["seconds"] * 60, 1) if result["seconds"] else 0.0,
+                s2_requests=s2_stats["requests"],
+                gemini_requests=gemini_stats["requests"],
+                throttled=s2_stats["throttled"] + gemini_stats["throttled"],
+                calls_per_kept=round(api_calls / result["kept"], 2) if result["kept"] else None,
+            )
+            report(result, args.json)
+
+    s2.stop()
+    gemini.stop()
+
+
+def report(result, as_json):
+    if as_json:
+        print(json.dumps(result))
+        return
+    settings = " ".join(f"{k}={v}" for k, v in result["config"].items())
+    stages = result["stages"]
+    bottleneck = max(stages, key=lambda name: stages[name]["utilization"])
+    print(f"📊 {settings}\n"
+          f"   papers/min={result['papers_per_minute']} papers={result['papers']} kept={result['kept']} "
+          f"seconds={result['seconds']} calls/kept={result['calls_per_kept']} "
+          f"(S2 {result['s2_requests']}, Gemini {result['gemini_requests']}, 429s {result['throttled']}) "
+          f"peak={result['peak_mb']}MB bottleneck={bottleneck}")
+
+
+if __name__ == "__main__":
+    main()
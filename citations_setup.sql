@@ -0,0 +1,26 @@
+-- 1. Citation columns on papers (safe to re-run)
+alter table papers add column if not exists "citationCount" integer;
+alter table papers add column if not exists citations_updated_at timestamp with time zone;
+
+-- 2. Bulk partial update of papers in ONE request.
+-- patches: [{"id": "<uuid>", "<column>": <value>, ...}, ...]
+-- Only the columns present in each patch object are changed.
+create or replace function bulk_patch_papers(patches jsonb)
+returns integer as $$
+declare
+  updated_count integer;
+begin
+  update papers p set
+    "citationCount" = case when x.patch ? 'citationCount' then r."citationCount" else p."citationCount" end,
+    citations_updated_at = case when x.patch ? 'citationCount' then now() else p.citations_updated_at end
+  from jsonb_array_elements(patches) as x(patch),
+       lateral jsonb_populate_record(null::papers, x.patch) as r
+  where p.id = (x.patch->>'id')::uuid;
+
+  get diagnostics updated_count = row_count;
+  return updated_count;
+end;
+$$ language plpgsql security definer;
+
+-- Only the service role (scripts) may call it
+revoke execute on function bulk_patch_papers(jsonb) from public, anon, authenticated;
@@ -1,6 +1,8 @@
 import os
 from supabase import create_client, Client, ClientOptions
 from dotenv import load_dotenv
+import dedupe
+import near_dupes
 
 # Load env variables (for local testing)
 load_dotenv(override=True)
@@ -47,18 +49,19 @@ def init_db():
     pass
 
 
-def save_paper(paper, search_topic, access_token=None):
-    """Saves a paper to Supabase Cloud."""
-    client = get_client(access_token)
-    if not client:
-        print("❌ DB Error: No connection.")
-        return
-
+def _paper_row(paper, search_topic):
+    """
+    Builds the papers-table row for a paper.
+    `search_topic` is a topic name or a list of topic names; the first one
+    is the paper's primary 'topic', all of them go into 'topics'.
+    """
     # 1. PREPARE THE DATA
     data = paper.copy()
 
-    # 2. ADD TOPIC
-    data['topic'] = search_topic
+    # 2. ADD TOPIC(S)
+    topic_list = [search_topic] if isinstance(search_topic, str) else list(search_topic)
+    data['topic'] = topic_list[0]
+    data['topics'] = topic_list
 
     # 3. SAFETY CHECKS
     # The API returns 'url', but sometimes your code might look for 'link'
@@ -81,30 +84,87 @@ def save_paper(paper, search_topic, access_token=None):
     if 'id' in data:
         del data['id']
 
-    # 5. INSERT
-    try:
-        response = client.table("papers").insert(data).execute()
-        print(f"   ✅ DB Saved: {data['title'][:30]}...")
-        if response.data and len(response.data) > 0:
-            return response.data[0]['id']
-    except Exception as e:
-        # Ignore duplicate errors, print others
-        if "duplicate key" in str(e):
-            print(f"   ⚠️ Skipped (Already in DB): {data['title'][:20]}...")
-            # Try to fetch existing ID if duplicate
-            # This is a bit expensive but necessary if we want to favorite it immediately
-            try:
-                # Assuming uniqueness by URL or Title?
-                # The schema doesn't strictly enforce unique title/url unless added
-                # But let's assume we can try to find it.
-                # Actually, simply returning None implies "Already Exists" 
-                # but we need the ID.
-                pass 
-            except:
-                pass
-        else:
-            print(f"   ☁️ Cloud DB Error: {e}")
-    return None
+    # 5. IDENTITY (unique, see paper_key_setup.sql)
+    data['paper_key'] = dedupe.paper_key(data)
+    return data
+
+
+def save_papers_bulk(entries, access_token=None):
+    """
+    Saves many papers at once. entries: [(paper, search_topic), ...]
+    Upserts on the unique 'paper_key' (existing rows are left untouched,
+    except that they gain the topics they were just saved for), then reads
+    back the ids of every row, new or existing. A paper whose
+    title nearly matches a stored one (another version of the same work,
+    see near_dupes.py) resolves to the stored row instead of a new one,
+    when this process has already loaded the stored index (the batch jobs
+    do; web UI saves never build it, the merge job catches those).
+    2 requests per call, whatever the batch size, plus one per stored
+    paper that gains a topic.
+    Returns the ids in the same order as `entries` (None where saving failed).
+    """
+    client = get_client(access_token)
+    if not client:
+        print("❌ DB Error: No connection.")
+        return [None] * len(entries)
+
+    rows = [_paper_row(paper, search_topic) for paper, search_topic in entries]
+    stored = near_dupes.loaded_index() if near_dupes.NEAR_DUPES_ENABLED else None
+    if stored is not None:
+        for row in rows:
+            if row['paper_key'] and row['paper_key'] not in stored:
+                match = stored.match(row)
+                if match:
+                    print(f"   🧬 Near-duplicate of a stored paper: {row['title'][:40]}...")
+                    row['paper_key'] = match
+
+    unique = {}
+    for row in rows:
+        if row['paper_key']:
+            first = unique.setdefault(row['paper_key'], row)
+            first['topics'] += [t for t in row['topics'] if t not in first['topics']]
+    if not unique:
+        return [None] * len(entries)
+
+    try:
+        inserted = client.table("papers") \
+            .upsert(list(unique.values()), on_conflict="paper_key",
+                    ignore_duplicates=True, default_to_null=False) \
+            .execute()
+        new_keys = {r.get('paper_key') for r in inserted.data or []}
+        ids = {}
+        # Keys go in the query string, so look them up in modest chunks
+        for chunk in _chunks(list(unique), 100):
+            res = client.table("papers").select("id, paper_key, topics").in_("paper_key", chunk).execute()
+            for r in res.data:
+                ids[r['paper_key']] = r['id']
+                # Already stored (or another version of it): file it under these topics too
+                if r['paper_key'] not in new_keys:
+                    add_paper_topics(r['id'], unique[r['paper_key']]['topics'], access_token,
+                                     current=r.get('topics') or [])
+        if stored is not None:
+            for key, row in unique.items():
+                if key in ids and key not in stored:
+                    stored.add(key, row)
+        print(f"   ✅ DB Saved: {len(inserted.data or [])} new, "
+              f"{len(ids) - len(inserted.data or [])} already stored.")
+        return [ids.get(row['paper_key']) for row in rows]
+    except Exception as e:
+        print(f"   ☁️ Cloud DB Error: {e}")
+        return [None] * len(entries)
+
+
+def save_paper(paper, search_topic, access_token=None):
+    """
+    Saves a paper to Supabase Cloud.
+    Returns its id, also when the paper was already stored.
+    """
+    return save_papers_bulk([(paper, search_topic)], access_token=access_token)[0]
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
 
 
 def get_papers_by_topic(topic, limit=20, access_token=None):
@@ -116,7 +176,7 @@ def get_papers_by_topic(topic, limit=20, access_token=None):
     try:
         response = client.table("papers") \
             .select(PAPER_COLUMNS) \
-            .eq("topic", topic) \
+            .contains("topics", [topic]) \
             .order("date_added", desc=True) \
             .limit(limit) \
             .execute()
@@ -146,6 +206,213 @@ def get_top_rated_papers(limit=8, access_token=None):
 
 
 
+# PostgREST caps every response (1000 rows by default), so bulk reads page through with range()
+PAGE_SIZE = 1000
+
+
+def get_known_paper_rows(topics=None, access_token=None):
+    """
+    Fetches the identity columns (paperId, url, paper_key) of every stored paper,
+    optionally restricted to a list of topics. Used to skip known papers
+    before they are sent to the AI.
+    """
+    client = get_client(access_token)
+    if not client:
+        return []
+
+    rows = []
+    try:
+        start = 0
+        while True:
+            query = client.table("papers").select("paperId, url, paper_key")
+            if topics:
+                query = query.overlaps("topics", list(topics))
+            response = query.order("id").range(start, start + PAGE_SIZE - 1).execute()
+            rows.extend(response.data)
+            if len(response.data) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+    except Exception as e:
+        print(f"Error fetching known papers: {e}")
+    return rows
+
+
+def get_all_papers_raw(columns="*", access_token=None):
+    """Fetches every row of the papers table (paged). Used by offline jobs."""
+    client = get_client(access_token)
+    if not client:
+        return []
+
+    rows = []
+    try:
+        start = 0
+        while True:
+            response = client.table("papers").select(columns) \
+                .order("id").range(start, start + PAGE_SIZE - 1).execute()
+            rows.extend(response.data)
+            if len(response.data) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+    except Exception as e:
+        print(f"Error fetching all papers: {e}")
+    return rows
+
+
+def iter_papers(columns="*", after_id=None, page_size=PAGE_SIZE, access_token=None):
+    """
+    Streams rows of the papers table ordered by id, one page at a time.
+    Uses keyset paging (id > last id), so a job can resume from `after_id`.
+    """
+    client = get_client(access_token)
+    if not client:
+        return
+
+    while True:
+        query = client.table("papers").select(columns)
+        if after_id:
+            query = query.gt("id", after_id)
+        response = query.order("id").limit(page_size).execute()
+        yield from response.data
+        if len(response.data) < page_size:
+            return
+        after_id = response.data[-1]['id']
+
+
+def iter_papers_missing(fields, columns="*", since=None, page_size=PAGE_SIZE, access_token=None):
+    """
+    Streams the rows where ANY of `fields` is NULL or an empty list,
+    filtered server-side and keyset-paged by id (like iter_papers).
+    `since` limits it to papers added on or after that date.
+    """
+    client = get_client(access_token)
+    if not client:
+        return
+
+    missing = ",".join(f"{f}.is.null,{f}.eq.[]" for f in fields)
+    after_id = None
+    while True:
+        query = client.table("papers").select(columns).or_(missing)
+        if since:
+            query = query.gte("date_added", since)
+        if after_id:
+            query = query.gt("id", after_id)
+        response = query.order("id").limit(page_size).execute()
+        yield from response.data
+        if len(response.data) < page_size:
+            return
+        after_id = response.data[-1]['id']
+
+
+def update_papers_bulk(patches, access_token=None):
+    """
+    Applies many partial updates in ONE request via the bulk_patch_papers RPC
+    (see citations_setup.sql / enrichment_setup.sql). patches: [{"id": ..., "<column>": value}, ...]
+    Returns the number of rows updated, or None if the write failed.
+    """
+    if not patches:
+        return 0
+    client = get_client(access_token)
+    if not client:
+        return None
+    try:
+        res = client.rpc("bulk_patch_papers", {"patches": patches}).execute()
+        return res.data or 0
+    except Exception as e:
+        print(f"Error bulk updating {len(patches)} papers: {e}")
+        return None
+
+
+# --- SCOUT STATE ---
+
+def get_scout_watermarks(access_token=None):
+    """Returns {topic: row} from scout_watermarks (see watermarks_setup.sql), or None if unavailable."""
+    client = get_client(access_token)
+    if not client:
+        return None
+    try:
+        res = client.table("scout_watermarks").select("*").execute()
+        return {row['topic']: row for row in res.data}
+    except Exception as e:
+        print(f"Error fetching scout watermarks: {e}")
+        return None
+
+
+def save_scout_watermark(topic, newest_date, seen_ids, access_token=None):
+    client = get_client(access_token)
+    if not client:
+        return False
+    try:
+        client.table("scout_watermarks").upsert({
+            "topic": topic,
+            "newest_date": newest_date,
+            "seen_ids": seen_ids,
+            "updated_at": "now()"
+        }).execute()
+        return True
+    except Exception as e:
+        print(f"Error saving watermark for '{topic}': {e}")
+        return False
+
+
+
+def claim_scout_lease(run_id, worker, units, lease_seconds, max_attempts, access_token=None):
+    """Leases one unfinished unit of a run (see scout_leases_setup.sql). Returns the unit or None."""
+    client = get_client(access_token)
+    if not client:
+        return None
+    try:
+        res = client.rpc("claim_scout_lease", {
+            "p_run_id": run_id, "p_worker": worker, "p_units": list(units),
+            "p_lease_seconds": lease_seconds, "p_max_attempts": max_attempts
+        }).execute()
+        return res.data or None
+    except Exception as e:
+        print(f"Error claiming a scout lease: {e}")
+        return None
+
+
+def heartbeat_scout_leases(run_id, worker, units, lease_seconds, access_token=None):
+    """Extends a worker's leases on `units`. Returns the units it still holds, or None if the call failed."""
+    client = get_client(access_token)
+    if not client:
+        return None
+    try:
+        res = client.rpc("heartbeat_scout_leases", {
+            "p_run_id": run_id, "p_worker": worker, "p_units": list(units),
+            "p_lease_seconds": lease_seconds
+        }).execute()
+        return set(res.data or [])
+    except Exception as e:
+        print(f"Error renewing scout leases: {e}")
+        return None
+
+
+def complete_scout_lease(run_id, worker, unit, access_token=None):
+    client = get_client(access_token)
+    if not client:
+        return False
+    try:
+        res = client.rpc("complete_scout_lease", {
+            "p_run_id": run_id, "p_worker": worker, "p_unit": unit
+        }).execute()
+        return bool(res.data)
+    except Exception as e:
+        print(f"Error completing scout lease '{unit}': {e}")
+        return False
+
+
+def get_scout_leases(run_id, access_token=None):
+    """Every lease row of a run, or None if unavailable."""
+    client = get_client(access_token)
+    if not client:
+        return None
+    try:
+        res = client.table("scout_leases").select("*").eq("run_id", run_id).order("unit").execute()
+        return res.data
+    except Exception as e:
+        print(f"Error fetching scout leases: {e}")
+        return None
+
 
 # --- USER & PROFILE FUNCTIONS ---
 
@@ -486,3 +753,55 @@ def get_paper_by_id(pid, user_id=None, access_token=None):
     except Exception as e:
         print(f"Error fetching paper {pid}: {e}")
         return None
+
+def update_paper(pid, updates, access_token=None):
+    """Applies a partial update to one paper. Returns True on success."""
+    client = get_client(access_token)
+    if not client:
+        return False
+    try:
+        client.table("papers").update(updates).eq("id", pid).execute()
+        return True
+    except Exception as e:
+        print(f"Error updating paper {pid}: {e}")
+        return False
+
+
+def merge_papers(keep_id, drop_ids, access_token=None):
+    """
+    Merges duplicate rows into `keep_id` via the merge_papers RPC (see
+    near_dupes_setup.sql): favorites, comments and topics move over and the
+    duplicates are deleted, in one transaction. Returns the rows deleted.
+    """
+    client = get_client(access_token)
+    if not client or not drop_ids:
+        return 0
+    try:
+        res = client.rpc("merge_papers", {"keep_id": keep_id, "drop_ids": list(drop_ids)}).execute()
+        return res.data or 0
+    except Exception as e:
+        print(f"Error merging {len(drop_ids)} papers into {keep_id}: {e}")
+        return 0
+
+
+def add_paper_topics(pid, new_topics, access_token=None, current=None):
+    """
+    Adds topics to a stored paper's 'topics' list (keeps existing ones).
+    Pass `current` when the paper's topics were just read, to skip a request.
+    """
+    client = get_client(access_token)
+    if not client:
+        return False
+    try:
+        if current is None:
+            res = client.table("papers").select("topics").eq("id", pid).execute()
+            if not res.data:
+                return False
+            current = res.data[0].get('topics') or []
+        merged = current + [t for t in new_topics if t not in current]
+        if merged != current:
+            client.table("papers").update({"topics": merged}).eq("id", pid).execute()
+        return True
+    except Exception as e:
+        print(f"Error adding topics to paper {pid}: {e}")
+        return False
@@ -0,0 +1,145 @@
+import re
+import threading
+from urllib.parse import urlsplit
+import near_dupes
+
+# --- NORMALIZATION HELPERS ---
+
+DOI_URL_PATTERN = re.compile(r"^https?://(dx\.)?doi\.org/", re.IGNORECASE)
+ARXIV_PATTERN = re.compile(r"arxiv\.org/(abs|pdf)/([^/?#]+?)(v\d+)?(\.pdf)?$")
+
+
+def normalize_doi(doi):
+    if not doi:
+        return None
+    return DOI_URL_PATTERN.sub("", doi.strip()).lower() or None
+
+
+def normalize_url(url):
+    """
+    Reduces a paper URL to a comparable form:
+    no scheme, no 'www.', no query/fragment, no trailing slash, lowercase host.
+    arXiv abs/pdf links (any version) collapse to 'arxiv.org/abs/<id>'.
+    """
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    path = parts.path.rstrip("/")
+    normalized = f"{host}{path}"
+
+    arxiv_match = ARXIV_PATTERN.search(normalized)
+    if arxiv_match:
+        return f"arxiv.org/abs/{arxiv_match.group(2)}"
+    return normalized or None
+
+
+def paper_keys(paper):
+    """
+    Returns every identity key we know for a paper, as 'kind:value' strings.
+    Works on raw Semantic Scholar results, curated feed dicts and DB rows.
+    """
+    keys = set()
+
+    if paper.get("paperId"):
+        keys.add(f"s2:{paper['paperId']}")
+
+    ids = paper.get("externalIds") or {}
+    doi = normalize_doi(ids.get("DOI"))
+    for link in (paper.get("url"), paper.get("link")):
+        if link and DOI_URL_PATTERN.match(link):
+            doi = doi or normalize_doi(link)
+    if doi:
+        keys.add(f"doi:{doi}")
+
+    pdf = (paper.get("openAccessPdf") or {}).get("url")
+    for link in (paper.get("url"), paper.get("link"), pdf):
+        normalized = normalize_url(link)
+        if normalized:
+            keys.add(f"url:{normalized}")
+
+    return keys
+
+
+def paper_key(paper):
+    """
+    The ONE canonical identity key of a paper, used as the unique
+    'paper_key' column of the papers table (see paper_key_setup.sql).
+    Prefers the S2 paperId, then the DOI, then the normalized URL.
+    """
+    if paper.get("paperId"):
+        return f"s2:{paper['paperId']}"
+
+    ids = paper.get("externalIds") or {}
+    doi = normalize_doi(ids.get("DOI"))
+    link = paper.get("url") or paper.get("link")
+    if not doi and link and DOI_URL_PATTERN.match(link):
+        doi = normalize_doi(link)
+    if doi:
+        return f"doi:{doi}"
+
+    normalized = normalize_url(link)
+    return f"url:{normalized}" if normalized else None
+
+
+class KnownPapers:
+    """
+    In-memory membership set of papers already in the database, by
+    identity key and by title similarity, so that another version of a
+    stored paper (preprint vs published) is also known. `near` is the
+    shared index of stored titles (near_dupes.stored_index()), keyed by
+    paper_key; only its matches among the known papers count.
+    Thread-safe; counts how many candidates were skipped per key kind.
+    """
+
+    def __init__(self, near=None):
+        self.keys = set()
+        self.near = near
+        self.skipped = {"s2": 0, "doi": 0, "url": 0, "near": 0}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, paper):
+        keys = paper_keys(paper)
+        if paper.get("paper_key"):
+            keys.add(paper["paper_key"])
+        with self._lock:
+            self.keys.update(keys)
+
+    def is_known(self, paper):
+        """True if any key of the paper is known, or a near-duplicate is. Records the skip."""
+        for key in sorted(paper_keys(paper)):
+            if key in self.keys:
+                with self._lock:
+                    self.skipped[key.split(":", 1)[0]] += 1
+                return True
+        if self.near is not None and any(key in self.keys for _, key in self.near.matches(paper)):
+            with self._lock:
+                self.skipped["near"] += 1
+            return True
+        return False
+
+    def filter_new(self, papers):
+        """Drops papers that are already known."""
+        return [p for p in papers if not self.is_known(p)]
+
+    def total_skipped(self):
+        return sum(self.skipped.values())
+
+
+def load_known_papers(topic_list=None):
+    """
+    Loads the identity keys of every stored paper (optionally only for some
+    topics). Titles come from the process-wide near-duplicate index, so they
+    are hashed once for both the known set and the saves.
+    """
+    import database
+
+    known = KnownPapers(near_dupes.stored_index() if near_dupes.NEAR_DUPES_ENABLED else None)
+    for row in database.get_known_paper_rows(topic_list):
+        known.add(row)
+    return known
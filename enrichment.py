@@ -0,0 +1,207 @@
+import argparse
+import os
+import threading
+import time
+from itertools import islice
+from typing import List
+from pydantic import BaseModel, Field
+from dotenv import load_dotenv
+import database
+import scholar_api
+
+load_dotenv()
+
+# --- CONFIG ---
+# Papers per Gemini call. The per-field prompts are small, so batches can be bigger than reviews.
+ENRICH_BATCH_SIZE = int(os.getenv("ENRICH_BATCH_SIZE", "12"))
+# Patches written per bulk_patch_papers request
+ENRICH_WRITE_BATCH = int(os.getenv("ENRICH_WRITE_BATCH", "100"))
+# Text shorter than this is not worth analyzing
+MIN_TEXT_LENGTH = 50
+
+
+# --- PER-FIELD SCHEMAS ---
+# (title_highlights needs no model: see keyphrases.py)
+
+class Findings(BaseModel):
+    index: int = Field(description="The [PAPER n] index this answer belongs to.")
+    key_findings: List[str] = Field(
+        description="3-5 bullet points. Prioritize specific numbers/metrics if available, otherwise list core arguments or conclusions.")
+    implications: List[str] = Field(
+        description="2-3 bullet points on the practical, real-world consequences.")
+
+
+class FindingsBatch(BaseModel):
+    items: List[Findings]
+
+
+class Enrichment:
+    """
+    One derived field group: the columns it fills, the minimal prompt and
+    schema that produce them, and the columns it needs to read.
+    """
+
+    def __init__(self, name, fields, batch_schema, instructions, columns, needs_text):
+        self.name = name
+        self.fields = fields
+        self.batch_schema = batch_schema
+        self.instructions = instructions
+        self.columns = columns
+        self.needs_text = needs_text
+
+    @staticmethod
+    def text(row):
+        # We try to use 'abstract', but fallback to 'summary' if abstract is missing
+        return row.get('abstract') or row.get('summary') or ""
+
+    def eligible(self, row):
+        if not row.get('title'):
+            return False
+        return not self.needs_text or len(self.text(row)) >= MIN_TEXT_LENGTH
+
+    def prompt(self, rows):
+        blocks = "\n".join(
+            f"""
+    [PAPER {i}]
+    - Title: {row['title']}""" + (f"""
+    - Abstract: {self.text(row)}""" if self.needs_text else "")
+            for i, row in enumerate(rows))
+        return f"""{self.instructions}
+    Answer for EACH of the {len(rows)} papers below and set 'index' to the paper's [PAPER n] number.
+    {blocks}
+    """
+
+    def patches(self, parsed, rows):
+        """Turns a parsed batch answer into bulk_patch_papers patches (non-empty answers only)."""
+        patches = {}
+        for item in parsed.items:
+            answer = item.model_dump()
+            index = answer.pop('index')
+            if not 0 <= index < len(rows) or rows[index]['id'] in patches:
+                continue
+            if all(answer.get(f) for f in self.fields):
+                patches[rows[index]['id']] = {"id": rows[index]['id'], **answer}
+        return list(patches.values())
+
+
+FINDINGS = Enrichment(
+    "findings", ("key_findings", "implications"), FindingsBatch,
+    """
+    You are a Scientific Editor for "Peripheral News."
+    For each paper extract:
+    1. 'key_findings': A LIST of specific numbers, key takeaways, or core arguments.
+    2. 'implications': A LIST of what this enables or why it matters.
+    """,
+    # Some rows carry the abstract, others only the summary
+    columns="*",
+    needs_text=True)
+
+ENRICHMENTS = {e.name: e for e in (FINDINGS,)}
+
+
+class PatchWriter:
+    """Buffers patches from the worker threads and writes them in bulk."""
+
+    def __init__(self, batch_size=ENRICH_WRITE_BATCH):
+        self.batch_size = batch_size
+        self.written = 0
+        self.requests = 0
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def add(self, patches):
+        with self._lock:
+            self._pending.extend(patches)
+            if len(self._pending) < self.batch_size:
+                return
+            batch, self._pending = self._pending, []
+        self._write(batch)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._write(batch)
+
+    def _write(self, batch):
+        updated = database.update_papers_bulk(batch)
+        with self._lock:
+            self.written += updated or 0
+            self.requests += 1
+
+
+def _enrich_chunk(enrichment, rows):
+    """One Gemini call for a chunk of rows. Returns (patches, rows to retry after throttling)."""
+    try:
+        response = scholar_api.generate(enrichment.prompt(rows), enrichment.batch_schema,
+                                        f"enrich:{enrichment.name}", len(rows))
+    except scholar_api.GeminiThrottled:
+        return [], rows
+    except Exception as e:
+        print(f"   ❌ {enrichment.name}: AI call failed for {len(rows)} papers: {e}")
+        return [], []
+    if response.parsed is None:
+        print(f"   ⚠️ {enrichment.name}: response did not match the schema.")
+        return [], []
+    return enrichment.patches(response.parsed, rows), []
+
+
+def run_enrichment(name, workers=4, limit=None, since=None, batch_size=None):
+    """
+    Fills the fields of enrichment `name` on every row that is missing them.
+    Rows are found server-side, sent in concurrent batches through the shared
+    Gemini gate and written back as batched partial updates. Rows that fail
+    stay missing, so simply running again retries them.
+    Returns a summary dict.
+    """
+    enrichment = ENRICHMENTS[name]
+    batch_size = batch_size or ENRICH_BATCH_SIZE
+    job = f"enrich_{name}"
+
+    rows = (row for row in database.iter_papers_missing(
+        enrichment.fields, enrichment.columns, since=since) if enrichment.eligible(row))
+    chunks = scholar_api.batched(islice(rows, limit), batch_size)
+
+    writer = PatchWriter()
+    sent = 0
+    filled = 0
+    started = time.monotonic()
+    print(f"📒 job={job} fields={','.join(enrichment.fields)} batch={batch_size} workers={workers}")
+
+    def counted(chunks):
+        nonlocal sent
+        for chunk in chunks:
+            sent += len(chunk)
+            yield chunk
+
+    def write(chunk, patches):
+        nonlocal filled
+        writer.add(patches)
+        filled += len(patches)
+        elapsed = time.monotonic() - started
+        rate = filled / elapsed if elapsed else 0.0
+        print(f"📊 job={job} sent={sent} filled={filled} "
+              f"rate={rate:.2f}/s elapsed={elapsed:.0f}s")
+
+    # A bounded number of chunks in flight, so the scan streams
+    scholar_api.run_gemini_batches(counted(chunks), lambda chunk: _enrich_chunk(enrichment, chunk),
+                                   write, workers=workers, in_flight=workers * 2)
+    writer.flush()
+    return {"sent": sent, "filled": filled, "written": writer.written,
+            "write_requests": writer.requests, "seconds": round(time.monotonic() - started, 1)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Fill AI-derived fields on papers that are missing them.")
+    parser.add_argument("field", choices=sorted(ENRICHMENTS))
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Batches sent in parallel")
+    parser.add_argument("--limit", type=int, default=None,
+                        help="Process at most this many papers in this run")
+    parser.add_argument("--since", default=None,
+                        help="Only papers added on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"Papers per AI call (default {ENRICH_BATCH_SIZE})")
+    args = parser.parse_args()
+    print(run_enrichment(args.field, args.workers, args.limit, args.since, args.batch_size))
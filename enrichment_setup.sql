@@ -0,0 +1,24 @@
+-- Extends bulk_patch_papers (citations_setup.sql) to the AI-derived fields
+-- filled by enrichment.py. Safe to re-run.
+create or replace function bulk_patch_papers(patches jsonb)
+returns integer as $$
+declare
+  updated_count integer;
+begin
+  update papers p set
+    "citationCount" = case when x.patch ? 'citationCount' then r."citationCount" else p."citationCount" end,
+    citations_updated_at = case when x.patch ? 'citationCount' then now() else p.citations_updated_at end,
+    title_highlights = case when x.patch ? 'title_highlights' then r.title_highlights else p.title_highlights end,
+    key_findings = case when x.patch ? 'key_findings' then r.key_findings else p.key_findings end,
+    implications = case when x.patch ? 'implications' then r.implications else p.implications end
+  from jsonb_array_elements(patches) as x(patch),
+       lateral jsonb_populate_record(null::papers, x.patch) as r
+  where p.id = (x.patch->>'id')::uuid;
+
+  get diagnostics updated_count = row_count;
+  return updated_count;
+end;
+$$ language plpgsql security definer;
+
+-- Only the service role (scripts) may call it
+revoke execute on function bulk_patch_papers(jsonb) from public, anon, authenticated;
@@ -0,0 +1,157 @@
+import email.utils
+import random
+import threading
+import time
+import httpx
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Status codes worth retrying: throttling and transient server failures
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+DEFAULT_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=10.0)
+
+
+def parse_retry_after(value):
+    """Retry-After is either delta-seconds or an HTTP date. Returns seconds or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+class PooledClient:
+    """
+    Shared keep-alive HTTP client for one API host.
+    - One connection pool (HTTP/2 when h2 is installed) reused across threads.
+    - Retries 429/5xx/timeouts/connection errors with jittered exponential
+      backoff, honoring the server's Retry-After header.
+    - Optional token bucket (rate_limits.TokenBucket) consulted before every attempt.
+    - Counts requests, retries by reason and new connections opened.
+    """
+
+    def __init__(self, name, headers=None, limiter=None, retries=4, backoff_base=1.0,
+                 backoff_cap=60.0, timeout=DEFAULT_TIMEOUT, max_connections=10, base_url=""):
+        self.name = name
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.client = httpx.Client(
+            base_url=base_url,
+            headers=headers or {},
+            timeout=timeout,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+        )
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.retries_by_reason = {"429": 0, "5xx": 0, "timeout": 0, "network": 0}
+        self.retry_after_seconds = 0.0
+        self.failures = 0
+
+    def _trace(self, event_name, info):
+        # httpcore emits this once per NEW connection; everything else reused one
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+
+    def _backoff(self, attempt, retry_after=None):
+        if retry_after is not None:
+            with self._lock:
+                self.retry_after_seconds += retry_after
+            # Server told us when: wait that long, plus a little jitter
+            return min(self.backoff_cap, retry_after) + random.uniform(0, 0.5)
+        # "Full jitter" exponential backoff
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _count_retry(self, reason):
+        with self._lock:
+            self.retries_by_reason[reason] += 1
+
+    def request(self, method, url, retries=None, timeout=None, stream=False, **kwargs):
+        """
+        Sends a request with retries. Returns the final httpx.Response
+        (which may still be an error status), or None if every attempt
+        failed at the network level.
+        With stream=True the body is not read: iterate it, then close() the response.
+        """
+        retries = self.retries if retries is None else retries
+        extensions = {"trace": self._trace}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+
+        for attempt in range(retries + 1):
+            if self.limiter:
+                self.limiter.acquire()
+            with self._lock:
+                self.requests += 1
+
+            try:
+                response = self.client.send(
+                    self.client.build_request(method, url, extensions=extensions, **kwargs),
+                    stream=stream)
+            except httpx.TimeoutException as e:
+                reason, response, error = "timeout", None, e
+            except httpx.TransportError as e:
+                reason, response, error = "network", None, e
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    return response
+                reason = "429" if response.status_code == 429 else "5xx"
+                error = f"HTTP {response.status_code}"
+                if stream and attempt < retries:
+                    response.close()
+
+            if attempt == retries:
+                break
+
+            retry_after = parse_retry_after(
+                response.headers.get("Retry-After")) if response is not None else None
+            wait_time = self._backoff(attempt, retry_after)
+            self._count_retry(reason)
+            print(f"⚠️ {self.name}: {error}. Retry {attempt + 1}/{retries} in {wait_time:.1f}s...")
+            time.sleep(wait_time)
+
+        with self._lock:
+            self.failures += 1
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            reused = max(0, self.requests - self.connections_opened)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "connection_reuse_rate": round(reused / self.requests, 3) if self.requests else 0.0,
+                "retries": dict(self.retries_by_reason),
+                "retry_after_seconds": round(self.retry_after_seconds, 1),
+                "failures": self.failures,
+                "http2": HTTP2_AVAILABLE,
+            }
+
+    def print_stats(self):
+        s = self.stats()
+        retries = ", ".join(f"{k}={v}" for k, v in s["retries"].items())
+        print(f"   🌐 {self.name}: {s['requests']} requests over {s['connections_opened']} connections "
+              f"({s['connection_reuse_rate']:.0%} reused, http2={s['http2']}), "
+              f"retries [{retries}], Retry-After waits {s['retry_after_seconds']}s, "
+              f"{s['failures']} failed")
@@ -0,0 +1,282 @@
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import mmh3
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIGURATION ---
+IMPACT_MODEL_PATH = os.getenv("IMPACT_MODEL_PATH", ".cache/impact_model.json")
+# off: never consult the model | shadow: report only | on: skip the LLM for predicted low-impact papers
+PREFILTER_MODE = os.getenv("PREFILTER_MODE", "shadow").lower()
+# Papers whose predicted keep-probability is below this are skipped (or counted, in shadow mode)
+PREFILTER_MIN_KEEP_PROB = float(os.getenv("PREFILTER_MIN_KEEP_PROB", "0.15"))
+# Training needs at least this many keep AND discard examples per threshold
+IMPACT_MIN_CLASS_EXAMPLES = int(os.getenv("IMPACT_MIN_CLASS_EXAMPLES", "50"))
+
+FEATURE_BITS = 18
+FEATURE_DIMS = 1 << FEATURE_BITS
+# Bumped whenever the features or training data change: older models are ignored
+FEATURE_VERSION = 3
+# Keep-thresholds used by the feeds: curated keeps >= 7, historical keeps >= 6
+KEEP_SCORES = (6, 7)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9\-]+")
+
+
+# --- FEATURES ---
+
+
+def _tokens(text):
+    return TOKEN_PATTERN.findall((text or "").lower())
+
+
+def featurize(title, venue, abstract):
+    """
+    Hashed bag of word unigrams + bigrams, namespaced per field.
+    Returns a sparse vector as a list of (index, value), L2-normalized.
+    """
+    counts = {}
+
+    def add(feature):
+        index = mmh3.hash(feature, signed=False) % FEATURE_DIMS
+        counts[index] = counts.get(index, 0.0) + 1.0
+
+    for prefix, text in (("t", title), ("a", abstract)):
+        words = _tokens(text)
+        for i, word in enumerate(words):
+            add(f"{prefix}:{word}")
+            if i + 1 < len(words):
+                add(f"{prefix}:{word}_{words[i + 1]}")
+    if venue:
+        add(f"v:{venue.strip().lower()}")
+
+    norm = math.sqrt(sum(v * v for v in counts.values())) or 1.0
+    return [(i, v / norm) for i, v in counts.items()]
+
+
+def _venue(paper):
+    venue = paper.get('venue') or paper.get('journal')
+    # Stored rows without a venue say "Journal" (see scholar_api._to_feed_entry)
+    return None if venue == "Journal" else venue
+
+
+def _paper_features(paper):
+    """
+    Title and venue only: the review log keeps no abstract, and stored rows
+    only carry Gemini's summary, which is written from the verdict we predict.
+    """
+    return featurize(paper.get('title'), _venue(paper), None)
+
+
+def _sigmoid(z):
+    if z < -30:
+        return 0.0
+    if z > 30:
+        return 1.0
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+# --- MODEL ---
+
+
+class LogisticModel:
+    """Sparse logistic regression over hashed features, trained with SGD."""
+
+    def __init__(self, weights=None, bias=0.0):
+        self.weights = weights or {}
+        self.bias = bias
+
+    def predict_proba(self, features):
+        z = self.bias + sum(self.weights.get(i, 0.0) * v for i, v in features)
+        return _sigmoid(z)
+
+    def fit(self, samples, epochs=8, learning_rate=0.5, l2=1e-5, seed=13):
+        """samples: list of (features, label in {0, 1})."""
+        positives = sum(label for _, label in samples) or 1
+        negatives = (len(samples) - positives) or 1
+        # Balance classes so a rare "keep" label is not ignored
+        class_weight = {1: len(samples) / (2.0 * positives),
+                        0: len(samples) / (2.0 * negatives)}
+
+        order = list(range(len(samples)))
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            rate = learning_rate / (1 + epoch)
+            for k in order:
+                features, label = samples[k]
+                gradient = (self.predict_proba(features) - label) * class_weight[label]
+                self.bias -= rate * gradient
+                for i, v in features:
+                    w = self.weights.get(i, 0.0)
+                    self.weights[i] = w - rate * (gradient * v + l2 * w)
+        return self
+
+    def to_dict(self):
+        return {"bias": self.bias,
+                "weights": {str(i): round(w, 6) for i, w in self.weights.items() if abs(w) > 1e-6}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({int(i): w for i, w in data["weights"].items()}, data["bias"])
+
+
+def load_models(path=IMPACT_MODEL_PATH):
+    """Returns {keep_score: LogisticModel}, or {} if no model has been trained yet."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("feature_version") != FEATURE_VERSION:
+        print(f"⚠️ {path} was trained on older features; retrain with 'python impact_model.py train'.")
+        return {}
+    return {int(score): LogisticModel.from_dict(m) for score, m in data["models"].items()}
+
+
+# --- PRE-FILTER ---
+
+
+class PreFilter:
+    """
+    Decides which candidates are worth a Gemini review.
+    In shadow mode every paper is still reviewed, but we count how many
+    papers the AI kept that the model would have dropped.
+    """
+
+    def __init__(self, mode=PREFILTER_MODE, min_keep_prob=PREFILTER_MIN_KEEP_PROB, path=IMPACT_MODEL_PATH):
+        self.mode = mode
+        self.min_keep_prob = min_keep_prob
+        self.path = path
+        self._models = None
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.flagged = 0
+        self.dropped = 0
+        self.kept_but_flagged = 0
+
+    def _get_models(self):
+        with self._lock:
+            if self._models is None:
+                self._models = load_models(self.path)
+                if self._models:
+                    print(f"🧮 Impact pre-filter loaded ({self.mode} mode).")
+            return self._models
+
+    def keep_probability(self, paper, min_score):
+        model = self._get_models().get(min_score)
+        if model is None:
+            return None
+        return model.predict_proba(_paper_features(paper))
+
+    def screen(self, papers, min_score):
+        """
+        Returns (papers_to_review, flagged_ids), where flagged_ids holds id()
+        of every paper the model predicts to score below `min_score`.
+        """
+        if self.mode == "off":
+            return papers, set()
+
+        to_review, flagged = [], set()
+        for paper in papers:
+            prob = self.keep_probability(paper, min_score)
+            if prob is None:
+                return papers, set()
+            with self._lock:
+                self.screened += 1
+            if prob >= self.min_keep_prob:
+                to_review.append(paper)
+                continue
+            flagged.add(id(paper))
+            with self._lock:
+                self.flagged += 1
+            if self.mode == "on":
+                with self._lock:
+                    self.dropped += 1
+            else:
+                to_review.append(paper)
+
+        if self.mode == "on" and len(to_review) < len(papers):
+            print(
+                f"   🧮 Pre-filter skipped {len(papers) - len(to_review)} predicted low-impact papers.")
+        return to_review, flagged
+
+    def record_kept(self, paper, flagged):
+        """Call for every paper the AI kept; counts shadow-mode false drops."""
+        if id(paper) in flagged:
+            with self._lock:
+                self.kept_but_flagged += 1
+
+    def print_stats(self):
+        if not self.screened:
+            return
+        print(f"   🧮 Pre-filter ({self.mode}, p<{self.min_keep_prob}): screened {self.screened}, "
+              f"flagged {self.flagged}, skipped {self.dropped}, "
+              f"kept-by-AI-but-flagged {self.kept_but_flagged}")
+
+
+# Shared process-wide pre-filter
+PREFILTER = PreFilter()
+
+
+# --- TRAINING ---
+
+
+def train_from_reviews(path=IMPACT_MODEL_PATH, holdout=0.2, min_class=IMPACT_MIN_CLASS_EXAMPLES):
+    """
+    Trains one keep/discard model per KEEP_SCORES threshold from the review
+    log (review_cache.py): every paper Gemini reviewed, discarded ones
+    included. A threshold with fewer than `min_class` examples of either
+    class gets no model, so the pre-filter never acts on it.
+    """
+    import review_cache
+
+    rows = [r for r in review_cache.REVIEWS.labels() if r.get('title') and isinstance(r.get('score'), int)]
+    random.Random(7).shuffle(rows)
+    split = int(len(rows) * (1 - holdout))
+    train_rows, test_rows = rows[:split], rows[split:]
+    print(f"📦 {len(rows)} logged reviews: training on {len(train_rows)}, validating on {len(test_rows)}.")
+
+    train_features = [_paper_features(r) for r in train_rows]
+    test_features = [_paper_features(r) for r in test_rows]
+
+    models = {}
+    for min_score in KEEP_SCORES:
+        keeps = sum(r['score'] >= min_score for r in rows)
+        print(f"   ⚖️ score>={min_score}: {keeps} keep / {len(rows) - keeps} discard")
+        if min(keeps, len(rows) - keeps) < min_class:
+            print(f"   ❌ score>={min_score}: fewer than {min_class} examples of a class; no model.")
+            continue
+        model = LogisticModel().fit(
+            [(f, int(r['score'] >= min_score)) for f, r in zip(train_features, train_rows)])
+        models[min_score] = model
+
+        keepers = [f for f, r in zip(test_features, test_rows) if r['score'] >= min_score]
+        skipped = sum(model.predict_proba(f) < PREFILTER_MIN_KEEP_PROB for f in test_features)
+        lost = sum(model.predict_proba(f) < PREFILTER_MIN_KEEP_PROB for f in keepers)
+        print(f"   🎯 score>={min_score}: would skip {skipped}/{len(test_rows)} reviews, "
+              f"losing {lost}/{len(keepers)} keepers (p<{PREFILTER_MIN_KEEP_PROB})")
+
+    if not models:
+        print("❌ Not enough reviews logged yet; no model saved.")
+        return None
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"feature_bits": FEATURE_BITS, "feature_version": FEATURE_VERSION,
+                   "models": {str(s): m.to_dict() for s, m in models.items()}}, f)
+    print(f"✅ Model saved to {path}")
+    return models
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "train":
+        train_from_reviews()
+    else:
+        print("Usage: python impact_model.py train")
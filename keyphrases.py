@@ -0,0 +1,204 @@
+import json
+import math
+import os
+import re
+import sys
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIGURATION ---
+TITLE_IDF_PATH = os.getenv("TITLE_IDF_PATH", ".cache/title_idf.json")
+# Highlights per title, and the longest phrase (in words) worth highlighting
+MAX_HIGHLIGHTS = 3
+MAX_PHRASE_WORDS = 4
+# Rows per bulk_patch_papers request when filling stored papers
+FILL_WRITE_BATCH = 500
+
+# Words (and their spans) exactly as written in the title
+WORD_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-+/'.]*[A-Za-z0-9+]|[A-Za-z0-9]")
+# Punctuation that ends a phrase
+BREAK_PATTERN = re.compile(r"[:;,()\[\]?!\"]|\s[-–—]\s")
+
+STOPWORDS = frozenset("""
+a an the and or but nor of for to in on at by with from into onto over under via
+as is are was were be been being this that these those its it their our we us
+do does can could should would may might will shall not no than then so such
+toward towards using use used based through between among across within without
+how what when where which who why new novel approach approaches method methods
+study studies analysis case review survey paper framework towards beyond about
+versus vs up down out off per all any each more most other some very
+i me my you your
+""".split())
+
+
+def _words(title):
+    """[(start, end, word)] for every word of the title."""
+    return [(m.start(), m.end(), m.group()) for m in WORD_PATTERN.finditer(title or "")]
+
+
+def _normalize(word):
+    return word.lower().strip(".'")
+
+
+class TitleIDF:
+    """Document frequency of title words over the stored papers."""
+
+    def __init__(self, documents=0, df=None):
+        self.documents = documents
+        self.df = df or {}
+
+    def idf(self, word):
+        # Unseen words are the rarest of all
+        return math.log((self.documents + 1) / (self.df.get(word, 0) + 1)) + 1.0
+
+    @classmethod
+    def build(cls, titles):
+        idf = cls()
+        for title in titles:
+            idf.documents += 1
+            for word in {_normalize(w) for _, _, w in _words(title)}:
+                idf.df[word] = idf.df.get(word, 0) + 1
+        return idf
+
+    def save(self, path=TITLE_IDF_PATH):
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"documents": self.documents, "df": self.df}, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=TITLE_IDF_PATH):
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data["documents"], data["df"])
+
+
+class KeyphraseExtractor:
+    """
+    Deterministic title highlighter. Candidate phrases are runs of
+    non-stopwords between punctuation; each is scored by the IDF of its
+    words plus a bonus for term-like shapes (acronyms, digits, hyphens).
+    The best non-overlapping phrases are returned VERBATIM from the title.
+    """
+
+    def __init__(self, idf=None):
+        self.idf = idf or TitleIDF()
+
+    def _word_score(self, word):
+        score = self.idf.idf(_normalize(word))
+        if any(c.isdigit() for c in word) or "-" in word:
+            score += 1.0
+        if len(word) > 1 and sum(c.isupper() for c in word) > 1:
+            # Acronyms and CamelCase names (LLM, CRISPR, GaN, ...)
+            score += 1.5
+        return score
+
+    def _candidates(self, title):
+        breaks = [m.start() for m in BREAK_PATTERN.finditer(title)]
+        run = []
+        for start, end, word in _words(title) + [(len(title), len(title), "")]:
+            crossed = run and any(run[-1][1] <= b < start for b in breaks)
+            if not word or _normalize(word) in STOPWORDS or crossed:
+                yield from self._split_run(run)
+                run = []
+            if word and _normalize(word) not in STOPWORDS and len(word) > 1:
+                run.append((start, end, word))
+
+    def _split_run(self, run):
+        """Long runs are cut into windows of at most MAX_PHRASE_WORDS words."""
+        if len(run) <= MAX_PHRASE_WORDS:
+            if run:
+                yield run
+            return
+        for i in range(len(run) - MAX_PHRASE_WORDS + 1):
+            yield run[i:i + MAX_PHRASE_WORDS]
+
+    def extract(self, title, max_phrases=MAX_HIGHLIGHTS):
+        if not title:
+            return []
+        scored = []
+        for run in self._candidates(title):
+            scores = [self._word_score(w) for _, _, w in run]
+            # Mean keeps long phrases from winning on length alone; the bonus favors multi-word terms
+            score = sum(scores) / len(scores) + 0.5 * (len(run) - 1)
+            scored.append((score, run[0][0], run[-1][1]))
+
+        chosen = []
+        for score, start, end in sorted(scored, key=lambda s: (-s[0], s[1])):
+            if any(start < c_end and c_start < end for c_start, c_end in chosen):
+                continue
+            chosen.append((start, end))
+            if len(chosen) == max_phrases:
+                break
+        return [title[start:end] for start, end in sorted(chosen)]
+
+
+_extractor = None
+_extractor_lock = threading.Lock()
+
+
+def extract(title, max_phrases=MAX_HIGHLIGHTS):
+    """Title highlights using the corpus IDF saved by `python keyphrases.py build-idf` (if any)."""
+    global _extractor
+    with _extractor_lock:
+        if _extractor is None:
+            _extractor = KeyphraseExtractor(TitleIDF.load())
+    return _extractor.extract(title, max_phrases)
+
+
+# --- OFFLINE JOBS ---
+
+
+def build_idf_from_database():
+    import database
+
+    titles = (row.get('title') for row in database.iter_papers("id, title"))
+    idf = TitleIDF.build(t for t in titles if t)
+    idf.save()
+    print(f"📚 Title IDF built from {idf.documents} papers ({len(idf.df)} words) -> {TITLE_IDF_PATH}")
+    return idf
+
+
+def fill_database(refresh_all=False, limit=None):
+    """Writes highlights for stored papers that have none (or for every paper with refresh_all)."""
+    import database
+
+    global _extractor
+    _extractor = KeyphraseExtractor(TitleIDF.load())
+    rows = database.iter_papers("id, title") if refresh_all else \
+        database.iter_papers_missing(("title_highlights",), "id, title")
+
+    patches = []
+    written = 0
+    for count, row in enumerate(rows, 1):
+        highlights = extract(row.get('title'))
+        if highlights:
+            patches.append({"id": row['id'], "title_highlights": highlights})
+        if len(patches) >= FILL_WRITE_BATCH:
+            written += database.update_papers_bulk(patches) or 0
+            patches = []
+            print(f"   ✍️ {written} papers highlighted...")
+        if limit and count >= limit:
+            break
+    written += database.update_papers_bulk(patches) or 0
+    print(f"✅ Title highlights written for {written} papers.")
+    return written
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else ""
+    if command == "build-idf":
+        build_idf_from_database()
+    elif command == "fill":
+        fill_database(refresh_all="--all" in sys.argv)
+    elif command == "show" and len(sys.argv) > 2:
+        print(extract(" ".join(sys.argv[2:])))
+    else:
+        print("Usage: python keyphrases.py build-idf | fill [--all] | show <title>")
@@ -0,0 +1,254 @@
+import datetime
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+from dotenv import load_dotenv
+import database
+
+load_dotenv()
+
+# --- CONFIGURATION ---
+# Where leases live: "supabase" (scout_leases table, see scout_leases_setup.sql),
+# "sqlite" (a local file, for several workers on one host), or "auto"
+SCOUT_LEASE_BACKEND = os.getenv("SCOUT_LEASE_BACKEND", "auto")
+SCOUT_LEASE_PATH = os.getenv("SCOUT_LEASE_PATH", ".cache/scout_leases.sqlite3")
+# A worker that misses heartbeats for this long loses its units to the others
+SCOUT_LEASE_SECONDS = int(os.getenv("SCOUT_LEASE_SECONDS", "300"))
+SCOUT_HEARTBEAT_SECONDS = float(os.getenv("SCOUT_HEARTBEAT_SECONDS", "60"))
+# A unit whose workers keep crashing is given up after this many claims
+SCOUT_LEASE_MAX_ATTEMPTS = int(os.getenv("SCOUT_LEASE_MAX_ATTEMPTS", "3"))
+
+
+def default_run_id():
+    """Workers of one run share this id: the Actions run, else the UTC date."""
+    return os.getenv("SCOUT_RUN_ID") or os.getenv("GITHUB_RUN_ID") or \
+        datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+
+def default_worker_id():
+    return os.getenv("SCOUT_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class SupabaseLeaseStore:
+    """Leases in the scout_leases table, claimed through row-locking RPCs."""
+
+    name = "supabase"
+
+    def claim(self, run_id, worker, units, lease_seconds, max_attempts):
+        return database.claim_scout_lease(run_id, worker, units, lease_seconds, max_attempts)
+
+    def heartbeat(self, run_id, worker, units, lease_seconds):
+        return database.heartbeat_scout_leases(run_id, worker, units, lease_seconds)
+
+    def complete(self, run_id, worker, unit):
+        return database.complete_scout_lease(run_id, worker, unit)
+
+    def status(self, run_id):
+        return database.get_scout_leases(run_id) or []
+
+
+class SqliteLeaseStore:
+    """
+    The same leases in a local SQLite file. Every claim runs in an
+    IMMEDIATE transaction, so processes on one host never share a unit.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path=SCOUT_LEASE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None,
+                                         check_same_thread=False)
+            self._conn.execute("""
+                create table if not exists scout_leases (
+                    run_id text not null,
+                    unit text not null,
+                    worker text,
+                    expires_at real,
+                    done_at real,
+                    attempts integer not null default 0,
+                    primary key (run_id, unit)
+                )""")
+        return self._conn
+
+    def _transaction(self, fn):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("begin immediate")
+            try:
+                result = fn(conn, time.time())
+                conn.execute("commit")
+                return result
+            except Exception:
+                conn.execute("rollback")
+                raise
+
+    def claim(self, run_id, worker, units, lease_seconds, max_attempts):
+        def claim(conn, now):
+            conn.executemany("insert or ignore into scout_leases (run_id, unit) values (?, ?)",
+                             [(run_id, u) for u in units])
+            free = conn.execute("""
+                select unit, attempts from scout_leases
+                where run_id = ? and done_at is null and attempts < ?
+                  and (worker is null or expires_at < ?)""", (run_id, max_attempts, now)).fetchall()
+            if not free:
+                return None
+            # Least tried first, then in the caller's order
+            position = {u: i for i, u in enumerate(units)}
+            unit = min(free, key=lambda r: (r[1], position.get(r[0], len(position)), r[0]))[0]
+            conn.execute("""
+                update scout_leases set worker = ?, expires_at = ?, attempts = attempts + 1
+                where run_id = ? and unit = ?""", (worker, now + lease_seconds, run_id, unit))
+            return unit
+
+        return self._transaction(claim)
+
+    def heartbeat(self, run_id, worker, units, lease_seconds):
+        def heartbeat(conn, now):
+            held = set()
+            for unit in units:
+                if conn.execute("""
+                        update scout_leases set expires_at = ?
+                        where run_id = ? and unit = ? and worker = ? and done_at is null""",
+                                (now + lease_seconds, run_id, unit, worker)).rowcount:
+                    held.add(unit)
+            return held
+
+        return self._transaction(heartbeat)
+
+    def complete(self, run_id, worker, unit):
+        def complete(conn, now):
+            return conn.execute("""
+                update scout_leases set done_at = ?, expires_at = null
+                where run_id = ? and unit = ? and worker = ? and done_at is null""",
+                                (now, run_id, unit, worker)).rowcount > 0
+
+        return self._transaction(complete)
+
+    def status(self, run_id):
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute("select * from scout_leases where run_id = ? order by unit", (run_id,))
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+
+
+def open_store(backend=None):
+    backend = backend or SCOUT_LEASE_BACKEND
+    if backend == "auto":
+        backend = "supabase" if database.get_client() else "sqlite"
+    return SupabaseLeaseStore() if backend == "supabase" else SqliteLeaseStore()
+
+
+class LeaseWorker:
+    """
+    One worker's side of a run: claims units one at a time, keeps every held
+    unit alive from a heartbeat thread, and marks units done once their work
+    is persisted. Units it stops heartbeating (crash, kill) expire and are
+    claimed by the other workers.
+    """
+
+    def __init__(self, units, run_id=None, worker_id=None, store=None,
+                 lease_seconds=SCOUT_LEASE_SECONDS, heartbeat_seconds=SCOUT_HEARTBEAT_SECONDS):
+        self.units = list(units)
+        self.run_id = run_id or default_run_id()
+        self.worker_id = worker_id or default_worker_id()
+        self.store = store or open_store()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.held = set()
+        self.completed = []
+        self.lost = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def claim(self):
+        """Leases the next unit (in `units` order). Returns it, or None once every unit is done or held."""
+        unit = self.store.claim(self.run_id, self.worker_id, self.units,
+                                self.lease_seconds, SCOUT_LEASE_MAX_ATTEMPTS)
+        if unit is not None:
+            with self._lock:
+                self.held.add(unit)
+            print(f"   🔒 [{self.worker_id}] leased '{unit}'")
+        return unit
+
+    def complete(self, unit):
+        with self._lock:
+            self.held.discard(unit)
+        if self.store.complete(self.run_id, self.worker_id, unit):
+            self.completed.append(unit)
+        else:
+            print(f"   ⚠️ [{self.worker_id}] lease on '{unit}' expired before it was done; "
+                  f"another worker may repeat it.")
+
+    def remaining(self):
+        """Units of the run that are not done yet and may still be claimed or finished."""
+        return [r['unit'] for r in self.store.status(self.run_id)
+                if not r.get('done_at') and r['attempts'] < SCOUT_LEASE_MAX_ATTEMPTS]
+
+    def abandon_held(self):
+        """
+        Stops renewing the units this worker failed to finish: they expire
+        and are claimed again (by any worker) until SCOUT_LEASE_MAX_ATTEMPTS.
+        """
+        with self._lock:
+            abandoned, self.held = self.held, set()
+        for unit in sorted(abandoned):
+            print(f"   ⚠️ [{self.worker_id}] '{unit}' did not finish; its lease will expire.")
+        return abandoned
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            with self._lock:
+                units = sorted(self.held)
+            if not units:
+                continue
+            held = self.store.heartbeat(self.run_id, self.worker_id, units, self.lease_seconds)
+            if held is None:
+                continue
+            with self._lock:
+                lost = self.held & (set(units) - held)
+                self.held -= lost
+                self.lost |= lost
+            for unit in sorted(lost):
+                print(f"   ⚠️ [{self.worker_id}] lost the lease on '{unit}' to another worker.")
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._heartbeat, name="lease-heartbeat", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        # Unfinished units are NOT released: they expire, so a crash and an early exit look the same
+
+
+def print_status(run_id=None, backend=None):
+    run_id = run_id or default_run_id()
+    store = open_store(backend)
+    rows = store.status(run_id)
+    done = sum(1 for r in rows if r.get('done_at'))
+    print(f"🔒 Run {run_id} ({store.name}): {done}/{len(rows)} units done")
+    for r in rows:
+        state = "done" if r.get('done_at') else ("held" if r.get('worker') else "open")
+        print(f"   {r['unit'][:40]:<40} {state:<5} worker={r.get('worker') or '-'} attempts={r['attempts']}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        print_status(sys.argv[2] if len(sys.argv) > 2 else None)
+    else:
+        print("Usage: python leases.py status [run_id]")
@@ -0,0 +1,206 @@
+import argparse
+import contextlib
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIG ---
+LLM_METRICS_PATH = os.getenv("LLM_METRICS_PATH", ".cache/llm_metrics.jsonl")
+LLM_METRICS_ENABLED = os.getenv("LLM_METRICS_ENABLED", "1") != "0"
+# USD per million tokens (gemini-2.0-flash list prices)
+INPUT_PRICE_PER_MTOK = float(os.getenv("GEMINI_INPUT_PRICE_PER_MTOK", "0.10"))
+OUTPUT_PRICE_PER_MTOK = float(os.getenv("GEMINI_OUTPUT_PRICE_PER_MTOK", "0.40"))
+
+# Who is calling the model. Defaults to the running script (nightly_scout, backfill, ...)
+_entry_point = contextvars.ContextVar(
+    "llm_entry_point",
+    default=os.path.splitext(os.path.basename(sys.argv[0] or ""))[0] or "unknown")
+_topic = contextvars.ContextVar("llm_topic", default=None)
+
+_lock = threading.Lock()
+# Tokens used by THIS process (whether or not the file is written), for run budgets
+_totals = {"calls": 0, "prompt_tokens": 0, "output_tokens": 0}
+
+
+@contextlib.contextmanager
+def context(entry_point=None, topic=None):
+    """Attributes every model call made inside the block to `entry_point` and/or `topic`."""
+    tokens = []
+    if entry_point is not None:
+        tokens.append((_entry_point, _entry_point.set(entry_point)))
+    if topic is not None:
+        tokens.append((_topic, _topic.set(topic)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def submit(pool, fn, *args):
+    """pool.submit() that carries the caller's attribution into the worker thread."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+def _append(record):
+    if not LLM_METRICS_ENABLED:
+        return
+    record = {"ts": round(time.time(), 3), "entry_point": _entry_point.get(),
+              "topic": _topic.get(), **record}
+    line = json.dumps(record) + "\n"
+    with _lock:
+        os.makedirs(os.path.dirname(LLM_METRICS_PATH) or ".", exist_ok=True)
+        with open(LLM_METRICS_PATH, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def record_call(model, purpose, outcome, latency_seconds, response=None, papers=1):
+    """One model call. outcome: ok | parse_fail | throttled | error."""
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None) or 0
+    output_tokens = getattr(usage, "candidates_token_count", None) or 0
+    with _lock:
+        _totals["calls"] += 1
+        _totals["prompt_tokens"] += prompt_tokens
+        _totals["output_tokens"] += output_tokens
+    _append({
+        "kind": "call",
+        "model": model,
+        "purpose": purpose,
+        "outcome": outcome,
+        "papers": papers,
+        "latency_ms": round(latency_seconds * 1000),
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+    })
+
+
+def record_kept(count=1):
+    """Papers kept (scored high enough) by the current entry point/topic."""
+    if count:
+        _append({"kind": "kept", "count": count})
+
+
+def record_candidates(count):
+    """Candidates put up for review by the current entry point/topic (cached or not)."""
+    if count:
+        _append({"kind": "candidates", "count": count})
+
+
+def usage_totals():
+    """{calls, prompt_tokens, output_tokens} of every call made by this process so far."""
+    with _lock:
+        return dict(_totals)
+
+
+# --- SUMMARY ---
+
+def cost_usd(prompt_tokens, output_tokens):
+    return (prompt_tokens * INPUT_PRICE_PER_MTOK + output_tokens * OUTPUT_PRICE_PER_MTOK) / 1_000_000
+
+
+def _percentile(values, q):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def load_records(path=LLM_METRICS_PATH, since=None):
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash
+                continue
+            if since is None or record["ts"] >= since:
+                records.append(record)
+    return records
+
+
+def summarize(records):
+    """Per topic / entry point: calls, tokens, cost, kept papers, cost per kept paper and latency."""
+    def empty():
+        return {"calls": 0, "prompt_tokens": 0, "output_tokens": 0, "kept": 0, "candidates": 0,
+                "outcomes": defaultdict(int), "latencies": []}
+
+    by_topic = defaultdict(empty)
+    by_entry = defaultdict(empty)
+    overall = empty()
+    for r in records:
+        groups = (by_topic[r.get("topic") or "(no topic)"], by_entry[r.get("entry_point") or "unknown"], overall)
+        for g in groups:
+            if r["kind"] in ("kept", "candidates"):
+                g[r["kind"]] += r["count"]
+                continue
+            g["calls"] += 1
+            g["prompt_tokens"] += r["prompt_tokens"]
+            g["output_tokens"] += r["output_tokens"]
+            g["outcomes"][r["outcome"]] += 1
+            g["latencies"].append(r["latency_ms"])
+
+    def finish(g):
+        cost = cost_usd(g["prompt_tokens"], g["output_tokens"])
+        return {
+            "calls": g["calls"],
+            "prompt_tokens": g["prompt_tokens"],
+            "output_tokens": g["output_tokens"],
+            "cost_usd": round(cost, 4),
+            "kept": g["kept"],
+            "candidates": g["candidates"],
+            "cost_per_kept_usd": round(cost / g["kept"], 5) if g["kept"] else None,
+            "outcomes": dict(g["outcomes"]),
+            "p50_ms": _percentile(g["latencies"], 0.50),
+            "p95_ms": _percentile(g["latencies"], 0.95),
+        }
+
+    return {
+        "overall": finish(overall),
+        "by_topic": {k: finish(v) for k, v in sorted(by_topic.items())},
+        "by_entry_point": {k: finish(v) for k, v in sorted(by_entry.items())},
+    }
+
+
+def print_summary(summary):
+    def line(name, s):
+        per_kept = f"${s['cost_per_kept_usd']:.5f}" if s['cost_per_kept_usd'] is not None else "-"
+        outcomes = " ".join(f"{k}={v}" for k, v in sorted(s['outcomes'].items()))
+        print(f"   {name[:34]:<34} calls={s['calls']:<5} tokens={s['prompt_tokens']}+{s['output_tokens']} "
+              f"cost=${s['cost_usd']:.4f} kept={s['kept']:<4} per_kept={per_kept} "
+              f"p50={s['p50_ms']}ms p95={s['p95_ms']}ms {outcomes}")
+
+    print("\n💰 LLM USAGE")
+    line("ALL", summary["overall"])
+    print("\n🏷️  By topic")
+    for name, s in summary["by_topic"].items():
+        line(name, s)
+    print("\n🚪 By entry point")
+    for name, s in summary["by_entry_point"].items():
+        line(name, s)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarize Gemini usage from the metrics file.")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("--since", default=None,
+                        help="Only calls on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args()
+
+    since = time.mktime(time.strptime(args.since, "%Y-%m-%d")) if args.since else None
+    summary = summarize(load_records(since=since))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
@@ -1,6 +1,7 @@
 from nicegui import ui, run, app
 from fastapi import Request
 import scholar_api
+import search_cache
 import database
 import topics
 import os
@@ -8,6 +9,8 @@ import re
 import auth
 import base64
 import io
+import asyncio
+import contextlib
 import time
 import html
 from PIL import Image
@@ -16,6 +19,13 @@ from PIL import Image
 database.init_db()
 app.add_static_files('/assets', 'assets')
 
+
+@app.get('/api/search-cache')
+def search_cache_stats():
+    """Hit rate and memory use of the shared arXiv search cache."""
+    return search_cache.SEARCHES.stats()
+
+
 from legal_pages import init_legal_pages
 init_legal_pages()
 
@@ -439,7 +449,8 @@ def header(on_topic_click=None, on_home_click=None, on_search=None, current_path
 
                 def handle_search():
                     if on_search and search_input.value:
-                        on_search(search_input.value)
+                        # Returned so async handlers are run by the event loop
+                        return on_search(search_input.value)
                 search_input.on('keydown.enter', handle_search)
 
             with ui.row().classes('items-center gap-4 min-w-max'):
@@ -1238,6 +1249,8 @@ def topic_pages(topic_name: str, request: Request):
     feed_grid = None
     pinned_paper = None
     results_grid = None
+    search_progress = None
+    search_task = None
 
     i_category = None
     i_icon = None
@@ -1268,8 +1281,14 @@ def topic_pages(topic_name: str, request: Request):
         ui.navigate.to(f'/topic/{t}')
 
     async def perform_search(query):
+        nonlocal search_task
         if not query:
             return
+        # A new search replaces the one still streaming in
+        if search_task and not search_task.done():
+            search_task.cancel()
+        search_task = asyncio.current_task()
+
         ui.notify(f'Searching ArXiv for "{query}"...')
         if results_grid:
             results_grid.clear()
@@ -1277,13 +1296,31 @@ def topic_pages(topic_name: str, request: Request):
             feed_grid.clear()
         if feed_label:
             feed_label.text = f'Search Results: "{query}"'
-        papers = await run.io_bound(scholar_api.search_arxiv, query)
-        if not papers:
+        if search_progress:
+            search_progress.value = 0
+            search_progress.classes(remove='hidden')
+
+        found = 0
+        try:
+            async with contextlib.aclosing(scholar_api.stream_arxiv(query)) as results:
+                async for done, total, paper in results:
+                    if search_progress:
+                        search_progress.value = done / total
+                    if feed_label:
+                        feed_label.text = f'Search Results: "{query}" ({done}/{total} analyzed)'
+                    if paper and feed_grid:
+                        found += 1
+                        with feed_grid:
+                            display_arxiv_card(feed_grid, paper)
+        finally:
+            if search_task is asyncio.current_task():
+                search_task = None
+                if search_progress:
+                    search_progress.classes(add='hidden')
+        if feed_label:
+            feed_label.text = f'Search Results: "{query}"'
+        if not found:
             ui.notify('No results found.', type='warning')
-        if feed_grid:
-            with feed_grid:
-                for paper in papers:
-                    display_arxiv_card(feed_grid, paper)
 
     def cancel_reset_timer():
         nonlocal reset_timer
@@ -1519,6 +1556,8 @@ def topic_pages(topic_name: str, request: Request):
             feed_label = ui.label('Loading...').classes(
                 'text-2xl font-bold text-slate-800')
             # REMOVED RESET BUTTON
+        search_progress = ui.linear_progress(value=0, show_value=False) \
+            .props('rounded color=indigo').classes('w-full hidden')
         feed_grid = ui.grid(columns=2).classes('w-full gap-4')
 
     async def init_load():
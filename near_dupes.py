@@ -0,0 +1,253 @@
+import argparse
+import os
+import random
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+import mmh3
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIG ---
+# Preprint and published versions rarely share an id or URL, but their
+# titles (and abstracts) are nearly identical. Estimated Jaccard similarity
+# at or above these thresholds counts as the same work.
+NEAR_DUPES_ENABLED = os.getenv("NEAR_DUPES_ENABLED", "1") != "0"
+TITLE_THRESHOLD = float(os.getenv("NEAR_DUPE_TITLE_THRESHOLD", "0.85"))
+ABSTRACT_THRESHOLD = float(os.getenv("NEAR_DUPE_ABSTRACT_THRESHOLD", "0.8"))
+
+# 64 MinHash permutations, split into 16 LSH bands of 4 rows:
+# pairs at Jaccard 0.85 share a band >99.9% of the time, pairs at 0.3 ~12%.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+TITLE_SHINGLE_CHARS = 5
+ABSTRACT_SHINGLE_WORDS = 3
+
+# Titles that differ only in these ("... Part II", "... 2024", "GPT-4") are different works
+ROMAN_NUMERALS = frozenset("ii iii iv vi vii viii ix xi xii".split())
+
+_PRIME = (1 << 61) - 1
+_random = random.Random(2024)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_text(text):
+    """Lowercase ASCII words only: drops accents, punctuation, LaTeX markup and extra spaces."""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode()
+    text = re.sub(r"\$[^$]*\$|\\[a-zA-Z]+", " ", text)
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def title_shingles(title):
+    text = normalize_text(title)
+    if len(text) <= TITLE_SHINGLE_CHARS:
+        return {text} if text else set()
+    return {text[i:i + TITLE_SHINGLE_CHARS] for i in range(len(text) - TITLE_SHINGLE_CHARS + 1)}
+
+
+def abstract_shingles(abstract):
+    words = normalize_text(abstract).split()
+    if len(words) < ABSTRACT_SHINGLE_WORDS:
+        return set()
+    return {" ".join(words[i:i + ABSTRACT_SHINGLE_WORDS])
+            for i in range(len(words) - ABSTRACT_SHINGLE_WORDS + 1)}
+
+
+def title_markers(title):
+    """Numbers and roman numerals of a title: they must agree for a title match."""
+    return frozenset(w for w in normalize_text(title).split()
+                     if w in ROMAN_NUMERALS or any(c.isdigit() for c in w))
+
+
+def minhash(shingles):
+    """MinHash signature: one murmur hash per shingle, re-mixed into NUM_PERM permutations."""
+    if not shingles:
+        return None
+    hashes = [mmh3.hash(s, signed=False) for s in shingles]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures."""
+    if sig_a is None or sig_b is None:
+        return 0.0
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def signatures(paper):
+    """(title signature, abstract signature, title markers). Stored rows have no abstract, only a title."""
+    title = paper.get('title')
+    return (minhash(title_shingles(title)), minhash(abstract_shingles(paper.get('abstract'))),
+            title_markers(title))
+
+
+def _bands(sig):
+    for band in range(BANDS):
+        yield band, sig[band * ROWS:(band + 1) * ROWS]
+
+
+class NearDupeIndex:
+    """
+    MinHash/LSH index of papers under caller-chosen keys (a paper_key,
+    a row id, a run record number...). Candidates come from the LSH
+    buckets, then are confirmed on the estimated title or abstract
+    similarity. Thread-safe.
+    """
+
+    def __init__(self):
+        self._signatures = {}
+        self._title_buckets = defaultdict(set)
+        self._abstract_buckets = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def __contains__(self, key):
+        return key in self._signatures
+
+    def add(self, key, paper, sigs=None):
+        sigs = sigs or signatures(paper)
+        title_sig, abstract_sig, _ = sigs
+        if title_sig is None and abstract_sig is None:
+            return
+        with self._lock:
+            self._signatures[key] = sigs
+            for sig, buckets in ((title_sig, self._title_buckets), (abstract_sig, self._abstract_buckets)):
+                if sig is not None:
+                    for band in _bands(sig):
+                        buckets[band].add(key)
+
+    def matches(self, paper, sigs=None):
+        """[(similarity, key)] of every indexed paper that is a near-duplicate, best first."""
+        title_sig, abstract_sig, markers = sigs or signatures(paper)
+        with self._lock:
+            candidates = set()
+            for sig, buckets in ((title_sig, self._title_buckets), (abstract_sig, self._abstract_buckets)):
+                if sig is not None:
+                    for band in _bands(sig):
+                        candidates.update(buckets.get(band, ()))
+            found = []
+            for key in candidates:
+                other_title, other_abstract, other_markers = self._signatures[key]
+                title_sim = similarity(title_sig, other_title) if markers == other_markers else 0.0
+                abstract_sim = similarity(abstract_sig, other_abstract)
+                if title_sim >= TITLE_THRESHOLD or abstract_sim >= ABSTRACT_THRESHOLD:
+                    found.append((max(title_sim, abstract_sim), key))
+        return sorted(found, key=lambda m: (-m[0], str(m[1])))
+
+    def match(self, paper, sigs=None):
+        """Key of the closest near-duplicate, or None."""
+        found = self.matches(paper, sigs)
+        return found[0][1] if found else None
+
+
+# --- STORED PAPERS (consulted before insert) ---
+
+_stored = None
+_stored_lock = threading.Lock()
+
+
+def stored_index():
+    """
+    Index of every stored paper title, keyed by paper_key. Loaded once per
+    process on first use and shared by dedupe.load_known_papers() and
+    database.save_papers_bulk(), which keeps it current once loaded.
+    """
+    global _stored
+    with _stored_lock:
+        if _stored is None:
+            import database
+
+            _stored = NearDupeIndex()
+            for row in database.iter_papers("id, title, paper_key"):
+                if row.get('paper_key'):
+                    _stored.add(row['paper_key'], row)
+            print(f"   🧬 Near-duplicate index: {len(_stored)} stored papers.")
+        return _stored
+
+
+def loaded_index():
+    """The stored index if this process already built it, else None (never builds it)."""
+    with _stored_lock:
+        return _stored
+
+
+# --- MERGE JOB ---
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        self.parent.setdefault(x, x)
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        self.parent[self.find(a)] = self.find(b)
+
+
+def _canonical(rows):
+    """The row a cluster is merged into: an S2 paper (richest metadata) if any, else the oldest."""
+    return min(rows, key=lambda r: (not (r.get('paper_key') or "").startswith("s2:"),
+                                    r.get('date_added') or "", r['id']))
+
+
+def find_clusters(rows):
+    """Groups rows (id, title, ...) into near-duplicate clusters of 2+ rows."""
+    index = NearDupeIndex()
+    groups = _UnionFind()
+    for row in rows:
+        sigs = signatures(row)
+        for _, other in index.matches(row, sigs):
+            groups.union(row['id'], other)
+        index.add(row['id'], row, sigs)
+
+    by_id = {row['id']: row for row in rows}
+    clusters = defaultdict(list)
+    for row_id in by_id:
+        clusters[groups.find(row_id)].append(by_id[row_id])
+    return [c for c in clusters.values() if len(c) > 1]
+
+
+def merge_existing(dry_run=False, limit=None):
+    """
+    Finds near-duplicate clusters in the papers table and merges each one
+    into its canonical row (favorites, comments and topics move over, the
+    other rows are deleted). Returns the number of rows removed.
+    """
+    import database
+
+    rows = [r for r in database.iter_papers("id, title, paper_key, date_added") if r.get('title')]
+    clusters = find_clusters(rows)
+    print(f"🧬 {len(rows)} papers scanned, {len(clusters)} near-duplicate clusters "
+          f"({sum(len(c) - 1 for c in clusters)} redundant rows).")
+
+    removed = 0
+    for cluster in clusters[:limit]:
+        keep = _canonical(cluster)
+        drop = [r for r in cluster if r['id'] != keep['id']]
+        print(f"   🔗 Keep '{keep['title'][:60]}' ({keep.get('paper_key')})")
+        for row in drop:
+            print(f"      ✂️ '{row['title'][:60]}' ({row.get('paper_key')})")
+        if dry_run:
+            removed += len(drop)
+        else:
+            removed += database.merge_papers(keep['id'], [r['id'] for r in drop])
+
+    print(f"✅ {'Would remove' if dry_run else 'Removed'} {removed} duplicate rows.")
+    return removed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Find and merge near-duplicate papers.")
+    parser.add_argument("command", choices=["merge"])
+    parser.add_argument("--dry-run", action="store_true", help="Only list the clusters")
+    parser.add_argument("--limit", type=int, default=None, help="Merge at most this many clusters")
+    args = parser.parse_args()
+    merge_existing(args.dry_run, args.limit)
@@ -0,0 +1,38 @@
+-- Merges near-duplicate papers (see near_dupes.py). Safe to re-run.
+-- Everything pointing at the duplicates moves to the kept row, then the duplicates are deleted.
+create or replace function merge_papers(keep_id uuid, drop_ids uuid[])
+returns integer as $$
+declare
+  deleted_count integer;
+begin
+  drop_ids := array_remove(drop_ids, keep_id);
+
+  -- Favorites: one per user (unique(user_id, paper_id)), keeping the earliest save
+  insert into saved_papers (user_id, paper_id, saved_at, last_viewed_at)
+  select user_id, keep_id, min(saved_at), max(last_viewed_at)
+  from saved_papers
+  where paper_id = any(drop_ids)
+  group by user_id
+  on conflict (user_id, paper_id) do nothing;
+  delete from saved_papers where paper_id = any(drop_ids);
+
+  -- Discussions follow the paper
+  update comments set paper_id = keep_id where paper_id = any(drop_ids);
+
+  -- The kept row appears in every feed any of the versions was in
+  update papers set topics = (
+    select coalesce(array_agg(distinct t), '{}')
+    from papers p, unnest(p.topics) as t
+    where p.id = keep_id or p.id = any(drop_ids)
+  )
+  where id = keep_id;
+
+  delete from papers where id = any(drop_ids);
+
+  get diagnostics deleted_count = row_count;
+  return deleted_count;
+end;
+$$ language plpgsql security definer;
+
+-- Only the service role (scripts) may call it
+revoke execute on function merge_papers(uuid, uuid[]) from public, anon, authenticated;
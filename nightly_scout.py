@@ -1,8 +1,21 @@
+import asyncio
+import threading
 import schedule
 import time
 import topics
 import scholar_api
 import database
+import dedupe
+import near_dupes
+import watermarks
+import leases
+import scheduler
+import arxiv_harvest
+import pipeline
+import llm_metrics
+import rate_limits
+import review_cache
+import impact_model
 import os
 import sys
 
@@ -10,40 +23,328 @@ import sys
 database.init_db()
 
 
-def perform_nightly_scan():
-    print("\n🌙 MIDNIGHT PROTOCOL INITIATED: Starting Batch Scan...")
+# --- SCAN ENGINE CONFIG ---
+# The scan is a 3-stage pipeline: fetch -> evaluate -> persist.
+# Each stage has its own worker count; bounded queues between them give backpressure.
+# Actual API throughput is governed by the limiters in rate_limits.py.
+FETCH_WORKERS = int(os.getenv("SCOUT_FETCH_WORKERS", "4"))
+EVALUATE_WORKERS = int(os.getenv("SCOUT_EVALUATE_WORKERS", "4"))
+PERSIST_WORKERS = int(os.getenv("SCOUT_PERSIST_WORKERS", "2"))
+QUEUE_SIZE = int(os.getenv("SCOUT_QUEUE_SIZE", "16"))
+REPORT_EVERY_SECONDS = float(os.getenv("SCOUT_REPORT_EVERY_SECONDS", "15"))
+# Candidates per topic (SCOUT_CANDIDATES_PER_TOPIC) are spread by scheduler.py
+
+
+class RunRegistry:
+    """
+    Tracks every candidate seen during one run, across topics, so each paper
+    is evaluated ONCE and saved with every topic that matched it. Other
+    versions of the same work (near-duplicate title or abstract) count as
+    the same paper.
+    """
+
+    def __init__(self):
+        self.records = []
+        self.key_owner = {}
+        self.near = near_dupes.NearDupeIndex() if near_dupes.NEAR_DUPES_ENABLED else None
+        self.collected = 0
+        self.near_collapsed = 0
+        self._lock = threading.Lock()
+
+    def claim(self, paper, topic):
+        """
+        Returns (record, is_new). A paper already seen under another topic
+        gets this topic added to its record instead of being queued again.
+        """
+        keys = dedupe.paper_keys(paper)
+        sigs = near_dupes.signatures(paper) if self.near is not None else None
+        with self._lock:
+            self.collected += 1
+            owner = next((self.key_owner[k] for k in keys if k in self.key_owner), None)
+            if owner is None and self.near is not None:
+                owner = self.near.match(paper, sigs)
+                self.near_collapsed += owner is not None
+            is_new = owner is None
+            if is_new:
+                owner = len(self.records)
+                self.records.append(
+                    {'paper': paper, 'topics': [], 'saved_id': None})
+                if self.near is not None:
+                    self.near.add(owner, paper, sigs)
+            record = self.records[owner]
+            added = topic not in record['topics']
+            if added:
+                record['topics'].append(topic)
+            for k in keys:
+                self.key_owner.setdefault(k, owner)
+            saved_id = record['saved_id']
+
+        # Matched after the paper was already persisted: attach the topic in the DB
+        if added and not is_new and saved_id:
+            database.add_paper_topics(saved_id, [topic])
+        return record, is_new
+
+
+class TopicProgress:
+    """
+    Tracks, per topic, the candidate records it collected that are not
+    settled yet, including records owned by another topic's chunk, and
+    calls on_done(topic) once all of them are reviewed (and saved if kept).
+    A record that failed (left unreviewed, not saved, dropped by the budget)
+    fails every topic that collected it; a chunk that raises never settles,
+    so its topics never finish. Only topics in `finished` may have their
+    watermark saved.
+    """
+
+    def __init__(self, on_done=None):
+        self.on_done = on_done
+        self.pending = {}
+        self.waiting = {}
+        self.settled = {}
+        self.finished = set()
+        self.failed = set()
+        self._lock = threading.Lock()
 
-    for topic in topics.ALL_TOPICS:
+    def _complete(self, topic):
+        """True (once) when `topic` just finished. Call with the lock held."""
+        if self.pending[topic] or topic in self.failed or topic in self.finished:
+            return False
+        self.finished.add(topic)
+        return True
+
+    def _notify(self, topics_done):
+        if self.on_done:
+            for topic in topics_done:
+                self.on_done(topic)
+
+    def fetched(self, topic, records):
+        with self._lock:
+            keys = set()
+            for record in records:
+                key = id(record)
+                if key not in self.settled:
+                    keys.add(key)
+                    self.waiting.setdefault(key, set()).add(topic)
+                elif not self.settled[key]:
+                    self.failed.add(topic)
+            self.pending[topic] = keys
+            done = [topic] if self._complete(topic) else []
+        self._notify(done)
+
+    def topics_of(self, records):
+        with self._lock:
+            return set().union(*(self.waiting.get(id(r), ()) for r in records))
+
+    def settle(self, records, ok):
+        done = []
+        with self._lock:
+            for record in records:
+                key = id(record)
+                self.settled[key] = self.settled.get(key, True) and ok
+                for topic in self.waiting.pop(key, ()):
+                    self.pending[topic].discard(key)
+                    if not ok:
+                        self.failed.add(topic)
+                    elif self._complete(topic):
+                        done.append(topic)
+        self._notify(done)
+
+
+def build_scan_pipeline(known, marks, registry, progress, plan, lease=None):
+    def fetch(topic):
+        """Stage 1: topic -> chunks of new, run-unique candidate records."""
+        # Close to the budget ceiling: start nothing new (the watermark stays put)
+        if plan.budget.winding_down():
+            return []
+        if lease is not None:
+            # Worker mode: the items are slots, each one leases the next free topic
+            topic = lease.claim()
+            if topic is None:
+                return []
         print(f"   🔭 Scouting: {topic}...")
-        try:
-            new_papers = scholar_api.get_curated_feed(topic, limit=3)
-            if new_papers:
-                print(f"      ✅ Found {len(new_papers)} papers.")
-                for paper in new_papers:
-                    # We save with the specific topic tag
-                    database.save_paper(paper, search_topic=topic)
-            else:
-                print("      ❌ No significant papers.")
-
-            # Sleep slightly to be polite to the API
-            time.sleep(2)
-
-        except Exception as e:
-            print(f"      ⚠️ Error scouting {topic}: {e}")
+        candidates = scholar_api.collect_candidates(
+            topic, plan.allocation[topic], known, scholar_api.FEED_MAX_PAGES, marks[topic])
+        claims = [registry.claim(paper, topic) for paper in candidates]
+        fresh = [record for record, is_new in claims if is_new]
+        print(f"      📥 [{topic}] {len(candidates)} candidates, {len(fresh)} not seen under another topic "
+              f"({marks[topic].examined} examined).")
+        # The topic also waits for the records another topic's chunks are reviewing
+        progress.fetched(topic, [record for record, _ in claims])
+        return list(scholar_api.batched(fresh, scholar_api.REVIEW_BATCH_SIZE))
+
+    def evaluate(chunk):
+        """Stage 2: chunk of records -> one batch of keepers (record, feed entry)."""
+        if plan.budget.exhausted():
+            # Dropped unreviewed: no watermark may move past these papers
+            for topic in progress.topics_of(chunk):
+                plan.cut_topic(topic)
+            progress.settle(chunk, ok=False)
+            return []
+        # Attributed to the topic that fetched the chunk
+        topic = chunk[0]['topics'][0]
+        with llm_metrics.context(topic=topic):
+            keepers, unreviewed = scholar_api.review_candidates([r['paper'] for r in chunk], 7)
+        by_paper = {id(r['paper']): r for r in chunk}
+        batch = [(by_paper[id(paper)], entry) for paper, entry in keepers]
+        if unreviewed:
+            # Its topics never finish, so the next run reads these papers again
+            print(f"      ⚠️ [{topic}] {unreviewed} papers got no review; the watermarks stay put.")
+            progress.settle(chunk, ok=False)
+        else:
+            # Discarded papers are settled now, keepers once they are saved
+            kept = {id(record) for record, _ in batch}
+            progress.settle([r for r in chunk if id(r) not in kept], ok=True)
+        return [batch] if batch else []
+
+    def persist(batch):
+        """Stage 3: save a batch of keepers, each with every topic that matched it."""
+        with registry._lock:
+            entries = [(entry, list(record['topics'])) for record, entry in batch]
+        for entry, paper_topics in entries:
+            print(f"      ✅ Keeping for {', '.join(paper_topics)}: {entry['title'][:40]}...")
+        saved_ids = database.save_papers_bulk(entries)
+
+        for (record, entry), (_, paper_topics), saved_id in zip(batch, entries, saved_ids):
+            with registry._lock:
+                record['saved_id'] = saved_id
+                late_topics = [t for t in record['topics'] if t not in paper_topics]
+            if saved_id and late_topics:
+                database.add_paper_topics(saved_id, late_topics)
+            known.add(entry)
+        progress.settle([record for (record, _), pid in zip(batch, saved_ids) if pid], ok=True)
+        progress.settle([record for (record, _), pid in zip(batch, saved_ids) if not pid], ok=False)
+        return [pid for pid in saved_ids if pid]
 
+    return pipeline.Pipeline([
+        pipeline.Stage("fetch", fetch, FETCH_WORKERS, QUEUE_SIZE),
+        pipeline.Stage("evaluate", evaluate, EVALUATE_WORKERS, QUEUE_SIZE),
+        pipeline.Stage("persist", persist, PERSIST_WORKERS, QUEUE_SIZE),
+    ], report_every=REPORT_EVERY_SECONDS)
+
+
+async def run_scan(known, topic_list=None, lease=None, plan=None):
+    """
+    Runs the fetch -> evaluate -> persist pipeline over every topic,
+    most promising topics first, within the budget of `plan` (see scheduler.py).
+    With a leases.LeaseWorker, only the topics this worker manages to lease
+    are scanned, and each one is marked done as soon as it is persisted.
+    Returns (number of papers saved, the finished pipeline, the run registry).
+    """
+    topic_list = topic_list or topics.ALL_TOPICS
+    plan = plan or scheduler.plan_run(topic_list)
+    marks = watermarks.load_all()
+    marks = {t: marks.get(t) or watermarks.Watermark(t) for t in topic_list}
+    registry = RunRegistry()
+
+    def topic_done(topic):
+        watermarks.save(marks[topic])
+        lease.complete(topic)
+
+    progress = TopicProgress(topic_done if lease is not None else None)
+    scan = build_scan_pipeline(known, marks, registry, progress, plan, lease)
+    await scan.run(plan.order if lease is None else [None] * len(topic_list))
+
+    print(f"   🧬 {registry.collected} candidates -> {len(registry.records)} unique papers "
+          f"({registry.collected - len(registry.records)} duplicates collapsed, "
+          f"{registry.near_collapsed} of them other versions of the same paper).")
+
+    # Only advance the watermarks of topics whose keepers are all persisted;
+    # failed or cut topics are read again from their old watermark next run
+    if lease is None:
+        for topic, mark in marks.items():
+            if topic in progress.finished and topic not in progress.failed and topic not in plan.cut:
+                await asyncio.to_thread(watermarks.save, mark)
+        failed = (progress.failed | set(progress.pending)) - progress.finished - plan.cut
+        if failed:
+            print(f"   ⚠️ {len(failed)} topics did not finish cleanly; their watermarks were not saved.")
+    return scan.stats()["persist"]["items_out"], scan, registry
+
+
+def run_worker(known, topic_list=None, plan=None):
+    """
+    Worker mode: scans leased topics until every topic of the run is done,
+    by this or any other worker, or this worker's budget runs out. Topics
+    of a worker that died are leased again once their heartbeat expires.
+    Returns (number of papers saved, the last pipeline).
+    """
+    topic_list = topic_list or topics.ALL_TOPICS
+    plan = plan or scheduler.plan_run(topic_list)
+    total_saved = 0
+    # Leases are handed out in plan order
+    with leases.LeaseWorker(plan.order) as lease:
+        print(f"   🔒 Worker {lease.worker_id} joined run {lease.run_id} ({lease.store.name} leases).")
+        while True:
+            saved, scan, _ = asyncio.run(run_scan(known, topic_list, lease, plan))
+            total_saved += saved
+            lease.abandon_held()
+            remaining = lease.remaining()
+            if not remaining or plan.budget.winding_down():
+                break
+            print(f"   ⏳ {len(remaining)} topics still leased elsewhere; waiting to reclaim any that expire...")
+            time.sleep(lease.heartbeat_seconds)
+        print(f"   🔓 Worker {lease.worker_id} finished {len(lease.completed)} topics.")
+    return total_saved, scan
+
+
+def perform_nightly_scan(worker=False, harvest=False):
+    print("\n🌙 MIDNIGHT PROTOCOL INITIATED: Starting Batch Scan...")
+    print(f"   ⚙️ Workers: fetch {FETCH_WORKERS} / evaluate {EVALUATE_WORKERS} / persist {PERSIST_WORKERS} | "
+          f"S2: {rate_limits.S2_REQUESTS_PER_SEC}/s | "
+          f"Gemini: {rate_limits.GEMINI_REQUESTS_PER_MIN}/min")
+
+    started = time.monotonic()
+    plan = scheduler.plan_run(topics.ALL_TOPICS)
+    plan.print_plan(limit=10)
+    # Load what we already have ONCE, so known papers never reach Gemini
+    known = dedupe.load_known_papers(topics.ALL_TOPICS)
+    print(f"   🗂️ Loaded {len(known)} identity keys of stored papers.")
+
+    if harvest:
+        # One arXiv listing per archive first; the per-topic searches then skip what it stored
+        arxiv_harvest.harvest(known=known, budget=plan.budget)
+
+    if worker:
+        total_saved, scan = run_worker(known, plan=plan)
+    else:
+        total_saved, scan, _ = asyncio.run(run_scan(known, plan=plan))
+    elapsed = time.monotonic() - started
+
+    print(f"   📊 {len(topics.ALL_TOPICS)} topics, {total_saved} papers in {elapsed:.1f}s "
+          f"(throttled S2 {rate_limits.S2_BUCKET.waited_seconds:.1f}s, "
+          f"Gemini {rate_limits.GEMINI_BUCKET.waited_seconds:.1f}s)")
+    print(f"   🪙 Budget: {plan.budget.tokens_used()} tokens, {plan.budget.used():.0%} of the run ceiling"
+          + (f"; dropped queued work of {len(plan.cut)} topics" if plan.cut else ""))
+    print(f"   ♻️ Skipped {known.total_skipped()} known duplicates before review "
+          f"(by paperId {known.skipped['s2']}, DOI {known.skipped['doi']}, URL {known.skipped['url']}, "
+          f"near-duplicate title {known.skipped['near']})")
+    scan.print_stats()
+    scholar_api.s2_http.print_stats()
+    rate_limits.GEMINI_AIMD.print_stats()
+    review_cache.REVIEWS.print_stats()
+    impact_model.PREFILTER.print_stats()
     print("🌞 PROTOCOL COMPLETE. Database updated.")
 
 
 if __name__ == "__main__":
+    # --worker: one of several processes splitting the topics through leases (see leases.py)
+    worker_mode = "--worker" in sys.argv
+    # --harvest: read the new arXiv listings in bulk before the topic searches (see arxiv_harvest.py)
+    harvest_mode = "--harvest" in sys.argv or os.getenv("SCOUT_ARXIV_HARVEST") == "1"
+    if worker_mode:
+        print("👷 Worker mode: topics are shared with the other scout workers of this run.")
+        # The harvest is not split by lease: leave it to one non-worker run
+        perform_nightly_scan(worker=True)
+        sys.exit(0)
+
     # Check if we are running in a GitHub Action
     if os.getenv("GITHUB_ACTIONS") == "true":
         print("🤖 Detected GitHub Actions environment. Running once...")
-        perform_nightly_scan()
+        perform_nightly_scan(harvest=harvest_mode)
         sys.exit(0)  # Exit cleanly so the Action finishes
     else:
         # Local Mode: Keep the schedule loop
         print("🕰️  Local Scout Agent running. Waiting for midnight...")
-        schedule.every().day.at("00:00").do(perform_nightly_scan)
+        schedule.every().day.at("00:00").do(perform_nightly_scan, harvest=harvest_mode)
 
         while True:
             schedule.run_pending()
@@ -0,0 +1,51 @@
+-- Canonical paper identity for bulk upserts (safe to re-run).
+-- Mirrors dedupe.paper_key(): 's2:<paperId>', else 'doi:<doi>', else 'url:<normalized url>'.
+alter table papers add column if not exists paper_key text;
+
+-- Same rules as dedupe.normalize_url()
+create or replace function normalize_paper_url(raw text)
+returns text as $$
+declare
+  s text;
+  host text;
+begin
+  if raw is null or btrim(raw) = '' then
+    return null;
+  end if;
+  s := regexp_replace(btrim(raw), '^[a-zA-Z][a-zA-Z0-9+.-]*://', '');
+  s := regexp_replace(s, '[?#].*$', '');
+  host := split_part(s, '/', 1);
+  s := regexp_replace(lower(host), '^www\.', '') || substr(s, length(host) + 1);
+  s := regexp_replace(s, '/+$', '');
+  if s ~ 'arxiv\.org/(abs|pdf)/[^/]+$' then
+    return 'arxiv.org/abs/' || regexp_replace(
+      substring(s from 'arxiv\.org/(?:abs|pdf)/([^/]+)$'), '(v[0-9]+)?(\.pdf)?$', '');
+  end if;
+  return nullif(s, '');
+end;
+$$ language plpgsql immutable;
+
+create or replace function compute_paper_key("paperId" text, url text)
+returns text as $$
+  select case
+    when "paperId" is not null and "paperId" <> '' then 's2:' || "paperId"
+    when url ~* '^https?://(dx\.)?doi\.org/' then 'doi:' || lower(regexp_replace(url, '^https?://(dx\.)?doi\.org/', '', 'i'))
+    else 'url:' || normalize_paper_url(url)
+  end;
+$$ language sql immutable;
+
+-- Backfill. When older rows already share a key, only the oldest one gets it
+-- (the others keep a NULL key, which the unique index allows).
+update papers p set paper_key = k.key
+from (
+  select distinct on (key) id, key
+  from (select id, date_added, compute_paper_key("paperId", url) as key from papers) keyed
+  where key is not null
+  order by key, date_added
+) k
+where p.id = k.id
+  and p.paper_key is null
+  and not exists (select 1 from papers other where other.paper_key = k.key);
+
+-- on_conflict target for database.save_papers_bulk()
+create unique index if not exists papers_paper_key_idx on papers (paper_key);
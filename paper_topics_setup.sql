@@ -0,0 +1,9 @@
+-- Multi-topic association: a paper can belong to several topic feeds (safe to re-run)
+alter table papers add column if not exists topics text[] not null default '{}';
+
+-- Backfill from the single legacy 'topic' column
+update papers set topics = array[topic]
+where topic is not null and not (topics @> array[topic]);
+
+-- Topic feeds filter with topics @> '{<topic>}'
+create index if not exists papers_topics_idx on papers using gin (topics);
@@ -0,0 +1,134 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Marks the end of the stream on a queue
+_DONE = object()
+
+
+class Stage:
+    """
+    One pipeline stage: `workers` tasks pull items from a bounded input
+    queue, run the blocking `fn(item)` in a thread and push every item of
+    the returned iterable (if any) to the next stage's queue.
+    """
+
+    def __init__(self, name, fn, workers=1, queue_size=16):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+        self._depth_samples = 0
+        self._depth_total = 0
+
+    def sample_depth(self):
+        depth = self.queue.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_samples += 1
+        self._depth_total += depth
+        return depth
+
+    def stats(self, wall_seconds):
+        capacity = self.workers * wall_seconds
+        return {
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "utilization": round(self.busy_seconds / capacity, 3) if capacity else 0.0,
+            "max_queue_depth": self.max_depth,
+            "avg_queue_depth": round(self._depth_total / self._depth_samples, 1) if self._depth_samples else 0.0,
+        }
+
+
+class Pipeline:
+    """
+    Staged producer/consumer pipeline connected by bounded asyncio queues.
+    A full queue blocks the upstream stage (backpressure), so a slow stage
+    throttles the ones before it instead of piling work up in memory.
+    """
+
+    def __init__(self, stages, report_every=15.0):
+        self.stages = stages
+        self.report_every = report_every
+        self.started = None
+        self.wall_seconds = 0.0
+
+    async def _worker(self, index, executor):
+        stage = self.stages[index]
+        next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        loop = asyncio.get_running_loop()
+
+        while True:
+            item = await stage.queue.get()
+            stage.sample_depth()
+            if item is _DONE:
+                return
+            stage.items_in += 1
+            began = time.monotonic()
+            try:
+                outputs = await loop.run_in_executor(executor, stage.fn, item)
+            except Exception as e:
+                stage.errors += 1
+                print(f"      ⚠️ [{stage.name}] {e}")
+                outputs = None
+            finally:
+                stage.busy_seconds += time.monotonic() - began
+
+            for output in outputs or ():
+                stage.items_out += 1
+                if next_stage is not None:
+                    await next_stage.queue.put(output)
+
+    async def _monitor(self):
+        while True:
+            await asyncio.sleep(self.report_every)
+            self.print_progress()
+
+    def print_progress(self):
+        elapsed = time.monotonic() - self.started
+        parts = []
+        for stage in self.stages:
+            depth = stage.sample_depth()
+            util = stage.busy_seconds / (stage.workers * elapsed) if elapsed else 0.0
+            parts.append(f"{stage.name} q={depth}/{stage.queue.maxsize} util={util:.0%}")
+        print(f"   📈 {' | '.join(parts)}")
+
+    async def run(self, source):
+        """Feeds every item of `source` into the first stage and waits for the pipeline to drain."""
+        self.started = time.monotonic()
+        total_workers = sum(s.workers for s in self.stages)
+        executor = ThreadPoolExecutor(max_workers=total_workers)
+        monitor = asyncio.create_task(self._monitor())
+
+        workers = [[asyncio.create_task(self._worker(i, executor)) for _ in range(stage.workers)]
+                   for i, stage in enumerate(self.stages)]
+        try:
+            for item in source:
+                self.stages[0].sample_depth()
+                await self.stages[0].queue.put(item)
+
+            # Shut down stage by stage: a stage ends once its upstream has finished
+            for stage, stage_workers in zip(self.stages, workers):
+                for _ in stage_workers:
+                    await stage.queue.put(_DONE)
+                await asyncio.gather(*stage_workers)
+        finally:
+            monitor.cancel()
+            executor.shutdown(wait=False)
+            self.wall_seconds = time.monotonic() - self.started
+
+    def stats(self):
+        return {stage.name: stage.stats(self.wall_seconds) for stage in self.stages}
+
+    def print_stats(self):
+        stats = self.stats()
+        for name, s in stats.items():
+            print(f"   🏭 {name}: in={s['items_in']} out={s['items_out']} errors={s['errors']} "
+                  f"util={s['utilization']:.0%} queue max={s['max_queue_depth']} avg={s['avg_queue_depth']}")
+        bottleneck = max(stats, key=lambda n: stats[n]['utilization'])
+        print(f"   🚧 Bottleneck: {bottleneck}")
@@ -0,0 +1,117 @@
+import os
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    Refills at `rate` tokens per second up to `capacity` (the burst size).
+    acquire() blocks the calling thread until a token is available.
+    """
+
+    def __init__(self, name, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError(f"TokenBucket '{name}' needs a positive rate, got {rate}")
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens +
+                          (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self, tokens=1):
+        """Blocks until `tokens` are available, then consumes them."""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return
+                wait = (tokens - self.tokens) / self.rate
+                self.waited_seconds += wait
+            time.sleep(wait)
+
+
+class AIMDLimiter:
+    """
+    Adaptive concurrency limit (Additive Increase / Multiplicative Decrease).
+    Each success adds ~1 slot per full window of successes; a throttling
+    response halves the limit (at most once per `cooldown` seconds, so one
+    burst of 429s counts as a single congestion signal).
+    """
+
+    def __init__(self, name, initial=2, minimum=1, maximum=16, decrease=0.5, cooldown=2.0):
+        self.name = name
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.successes = 0
+        self.throttles = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        """Blocks until a concurrency slot is free."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def release(self, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.throttles += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= self.cooldown:
+                    self._last_decrease = now
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    print(f"🐢 {self.name}: throttled, concurrency -> {int(self.limit)}")
+            else:
+                self.successes += 1
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def print_stats(self):
+        print(f"   🎚️ {self.name} concurrency: now {int(self.limit)}, peak in flight {self.peak_in_flight}, "
+              f"{self.successes} ok / {self.throttles} throttled")
+
+
+# --- CONFIGURATION ---
+# Defaults match the published quotas: 1 req/s for an S2 API key,
+# and a conservative requests-per-minute budget for Gemini Flash.
+S2_REQUESTS_PER_SEC = float(os.getenv("S2_REQUESTS_PER_SEC", "1"))
+S2_BURST = float(os.getenv("S2_BURST", "1"))
+GEMINI_REQUESTS_PER_MIN = float(os.getenv("GEMINI_REQUESTS_PER_MIN", "60"))
+GEMINI_BURST = float(os.getenv("GEMINI_BURST", "5"))
+# arXiv asks harvesters for at most one request every 3 seconds
+ARXIV_OAI_REQUESTS_PER_SEC = float(os.getenv("ARXIV_OAI_REQUESTS_PER_SEC", str(1 / 3)))
+
+# Shared per-host limiters (one per process)
+S2_BUCKET = TokenBucket("api.semanticscholar.org",
+                        S2_REQUESTS_PER_SEC, S2_BURST)
+GEMINI_BUCKET = TokenBucket(
+    "gemini", GEMINI_REQUESTS_PER_MIN / 60.0, GEMINI_BURST)
+ARXIV_OAI_BUCKET = TokenBucket("export.arxiv.org", ARXIV_OAI_REQUESTS_PER_SEC, 1)
+
+# Adaptive parallelism for Gemini calls (on top of the request-rate bucket)
+GEMINI_INITIAL_CONCURRENCY = int(os.getenv("GEMINI_INITIAL_CONCURRENCY", "2"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_AIMD = AIMDLimiter("gemini", GEMINI_INITIAL_CONCURRENCY,
+                          maximum=GEMINI_MAX_CONCURRENCY)
@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import time
+import database
+import dedupe
+import scholar_api
+
+# Local checkpoint so a crashed run resumes where it stopped
+CHECKPOINT_PATH = os.getenv(
+    "CITATION_CHECKPOINT_PATH", ".cache/citation_refresh.json")
+
+
+def s2_lookup_id(row):
+    """Best identifier for /paper/batch: S2 paperId, else DOI, else arXiv id."""
+    if row.get('paperId'):
+        return row['paperId']
+    for key in sorted(dedupe.paper_keys(row)):
+        kind, value = key.split(":", 1)
+        if kind == "doi":
+            return f"DOI:{value}"
+        if kind == "url" and value.startswith("arxiv.org/abs/"):
+            return f"ARXIV:{value.rsplit('/', 1)[-1]}"
+    return None
+
+
+def load_checkpoint(path=CHECKPOINT_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f).get("last_id")
+
+
+def save_checkpoint(last_id, path=CHECKPOINT_PATH):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    # Write-then-rename so a crash never leaves a half-written checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"last_id": last_id, "saved_at": time.time()}, f)
+    os.replace(tmp_path, path)
+
+
+def run_citation_refresh(chunk_size=scholar_api.S2_BATCH_MAX_IDS, restart=False):
+    print("\n" + "="*60)
+    print("📈  CITATION REFRESH")
+    print("    Updating citationCount from Semantic Scholar /paper/batch")
+    print("="*60 + "\n")
+
+    after_id = None if restart else load_checkpoint()
+    if after_id:
+        print(f"⏩  Resuming after paper id {after_id}")
+
+    rows_seen = 0
+    rows_changed = 0
+    rows_unmatched = 0
+    started = time.monotonic()
+
+    rows = database.iter_papers(
+        "id, paperId, url, citationCount", after_id=after_id)
+    for chunk in scholar_api.batched(rows, chunk_size):
+        lookups = [(row, s2_lookup_id(row)) for row in chunk]
+        lookups = [(row, s2_id) for row, s2_id in lookups if s2_id]
+
+        patches = []
+        if lookups:
+            results = scholar_api.fetch_paper_batch(
+                [s2_id for _, s2_id in lookups], fields="citationCount")
+            if results is None:
+                print("❌  Batch request failed. Stopping; re-run to resume.")
+                break
+
+            for (row, _), result in zip(lookups, results):
+                if not result:
+                    rows_unmatched += 1
+                    continue
+                count = result.get('citationCount')
+                if count is not None and count != row.get('citationCount'):
+                    patches.append({"id": row['id'], "citationCount": count})
+
+        if patches:
+            updated = database.update_papers_bulk(patches)
+            if updated is None:
+                print("❌  Writing citation counts failed. Stopping; re-run to resume.")
+                break
+            rows_changed += updated
+
+        rows_seen += len(chunk)
+        save_checkpoint(chunk[-1]['id'])
+
+        elapsed = time.monotonic() - started
+        print(f"   📊 rows={rows_seen} changed={rows_changed} unmatched={rows_unmatched} "
+              f"rate={rows_seen / elapsed if elapsed else 0:.1f} rows/s")
+    else:
+        # Finished the whole table: next run starts from the top again
+        if os.path.exists(CHECKPOINT_PATH):
+            os.remove(CHECKPOINT_PATH)
+
+    elapsed = time.monotonic() - started
+    print("\n" + "="*60)
+    print(f"✅  REFRESH DONE in {elapsed:.1f}s")
+    print(f"    Rows scanned: {rows_seen} | Citation counts changed: {rows_changed}")
+    print("="*60 + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Refresh citation counts of stored papers.")
+    parser.add_argument("--chunk-size", type=int, default=scholar_api.S2_BATCH_MAX_IDS,
+                        help="IDs per /paper/batch request (max 500)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the checkpoint and start from the first paper")
+    args = parser.parse_args()
+    run_citation_refresh(min(args.chunk_size, scholar_api.S2_BATCH_MAX_IDS), args.restart)
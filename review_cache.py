@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIGURATION ---
+REVIEW_CACHE_PATH = os.getenv("REVIEW_CACHE_PATH", ".cache/reviews.sqlite3")
+REVIEW_CACHE_MAX_ENTRIES = int(os.getenv("REVIEW_CACHE_MAX_ENTRIES", "20000"))
+REVIEW_CACHE_ENABLED = os.getenv("REVIEW_CACHE_ENABLED", "true").lower() != "false"
+# Title, venue and score of every review, kept or discarded: training data for impact_model.py
+REVIEW_LOG_ENABLED = os.getenv("REVIEW_LOG_ENABLED", "true").lower() != "false"
+
+
+def make_key(title, abstract, prompt_version, model):
+    """Content address for a review: same paper + same prompt + same model = same review."""
+    payload = "\x1f".join([
+        (title or "").strip(),
+        (abstract or "").strip(),
+        str(prompt_version),
+        model,
+    ])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ReviewCache:
+    """
+    Persistent, size-bounded LRU cache of AI reviews backed by SQLite.
+    The same file holds the review log (table 'labels'), which is never
+    evicted. Safe to share between threads.
+    """
+
+    def __init__(self, path=REVIEW_CACHE_PATH, max_entries=REVIEW_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            folder = os.path.dirname(self.path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                create table if not exists reviews (
+                    key text primary key,
+                    review text not null,
+                    last_used real not null
+                )""")
+            self._conn.execute(
+                "create index if not exists reviews_last_used on reviews(last_used)")
+            self._conn.execute("""
+                create table if not exists labels (
+                    key text primary key,
+                    title text,
+                    venue text,
+                    score integer not null,
+                    logged_at real not null
+                )""")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key):
+        """Returns the cached review dict, or None on a miss."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "select review from reviews where key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("update reviews set last_used = ? where key = ?",
+                         (time.time(), key))
+            conn.commit()
+            self.hits += 1
+            return json.loads(row[0])
+
+    def put(self, key, review):
+        """Stores a review and evicts the least recently used entries past the size bound."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("insert or replace into reviews (key, review, last_used) values (?, ?, ?)",
+                         (key, json.dumps(review), time.time()))
+            overflow = conn.execute(
+                "select count(*) from reviews").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute("""
+                    delete from reviews where key in (
+                        select key from reviews order by last_used asc limit ?
+                    )""", (overflow,))
+                self.evictions += overflow
+            conn.commit()
+
+    def log_label(self, key, title, venue, score):
+        """Records one review's outcome (same key as the cached review, so re-reviews overwrite)."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("insert or replace into labels (key, title, venue, score, logged_at) "
+                         "values (?, ?, ?, ?, ?)", (key, title, venue, score, time.time()))
+            conn.commit()
+
+    def labels(self):
+        """Every logged review as {title, venue, score}."""
+        with self._lock:
+            rows = self._connect().execute("select title, venue, score from labels").fetchall()
+        return [{"title": title, "venue": venue, "score": score} for title, venue, score in rows]
+
+    def stats(self):
+        with self._lock:
+            size = self._connect().execute(
+                "select count(*) from reviews").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": size,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"   🗃️ Review cache: {s['hits']} hits / {s['misses']} misses "
+              f"({s['hit_rate']:.0%}), {s['evictions']} evicted, {s['entries']} stored")
+
+
+# Shared process-wide cache
+REVIEWS = ReviewCache()
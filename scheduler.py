@@ -0,0 +1,236 @@
+import argparse
+import math
+import os
+import threading
+import time
+from dotenv import load_dotenv
+import llm_metrics
+
+load_dotenv()
+
+# --- CONFIGURATION ---
+# Unreviewed candidates collected per topic, on average
+SCOUT_CANDIDATES_PER_TOPIC = int(os.getenv("SCOUT_CANDIDATES_PER_TOPIC", "12"))
+# Candidates reviewed per run, spread over the topics (default: SCOUT_CANDIDATES_PER_TOPIC each)
+SCOUT_RUN_CANDIDATES = int(os.getenv("SCOUT_RUN_CANDIDATES", "0"))
+# Hard ceilings for one run (0 = none). The default time ceiling sits well inside
+# the 6h GitHub Actions job limit, so a slow run ends cleanly instead of being killed.
+SCOUT_MAX_TOKENS = int(os.getenv("SCOUT_MAX_TOKENS", "0"))
+SCOUT_MAX_MINUTES = float(os.getenv("SCOUT_MAX_MINUTES", "300"))
+# Share of a ceiling after which no new topic is started (in-flight work still finishes)
+SCOUT_WIND_DOWN_AT = float(os.getenv("SCOUT_WIND_DOWN_AT", "0.85"))
+
+# Past runs considered when estimating a topic's yield
+SCHEDULER_HISTORY_DAYS = int(os.getenv("SCHEDULER_HISTORY_DAYS", "30"))
+# Every topic gets at least this many candidates, so a cold or unlucky topic keeps being sampled
+SCHEDULER_MIN_CANDIDATES = int(os.getenv("SCHEDULER_MIN_CANDIDATES", "4"))
+# ...and at most this multiple of the even share
+SCHEDULER_MAX_SHARE = float(os.getenv("SCHEDULER_MAX_SHARE", "3"))
+# Weight of the all-topics average in a topic's estimate, in candidates
+PRIOR_CANDIDATES = 24
+# Bonus for topics with little history, relative to the average yield
+EXPLORATION = 0.5
+
+
+class TopicYield:
+    """What past runs got out of one topic."""
+
+    def __init__(self, topic, candidates=0, kept=0, tokens=0):
+        self.topic = topic
+        self.candidates = candidates
+        self.kept = kept
+        self.tokens = tokens
+
+
+def load_history(days=SCHEDULER_HISTORY_DAYS, records=None):
+    """{topic: TopicYield} from the LLM metrics file (candidates, keepers and tokens per topic)."""
+    if records is None:
+        records = llm_metrics.load_records(since=time.time() - days * 86400)
+    history = {}
+    for r in records:
+        topic = r.get("topic")
+        if not topic:
+            continue
+        stats = history.setdefault(topic, TopicYield(topic))
+        if r["kind"] == "candidates":
+            stats.candidates += r["count"]
+        elif r["kind"] == "kept":
+            stats.kept += r["count"]
+        elif r["kind"] == "call":
+            stats.tokens += r["prompt_tokens"] + r["output_tokens"]
+    return history
+
+
+def expected_values(topic_list, history):
+    """
+    Expected keepers per (average-cost) candidate of every topic.
+    Keep rates and token costs are shrunk towards the all-topics average, so
+    a topic with little history starts near the average, plus an exploration
+    bonus that fades as its history grows.
+    """
+    seen = [history[t] for t in topic_list if t in history]
+    total_candidates = sum(s.candidates for s in seen)
+    mean_rate = (sum(s.kept for s in seen) + 1) / (total_candidates + 2)
+    mean_cost = sum(s.tokens for s in seen) / total_candidates if total_candidates else 0.0
+
+    values = {}
+    for topic in topic_list:
+        stats = history.get(topic) or TopicYield(topic)
+        n = stats.candidates
+        rate = (stats.kept + PRIOR_CANDIDATES * mean_rate) / (n + PRIOR_CANDIDATES)
+        value = rate
+        if mean_cost:
+            cost = (stats.tokens + PRIOR_CANDIDATES * mean_cost) / (n + PRIOR_CANDIDATES)
+            value = rate * mean_cost / cost
+        bonus = EXPLORATION * mean_rate * math.sqrt(PRIOR_CANDIDATES / (n + PRIOR_CANDIDATES))
+        values[topic] = value + bonus
+    return values
+
+
+def allocate(values, total, floor=SCHEDULER_MIN_CANDIDATES, max_share=SCHEDULER_MAX_SHARE):
+    """
+    Splits `total` candidates over the topics in proportion to their value:
+    a floor for every topic, the rest proportionally (capped, largest
+    remainders rounded up). Returns {topic: candidates}.
+    """
+    topic_list = list(values)
+    if not topic_list:
+        return {}
+    floor = min(floor, total // len(topic_list))
+    cap = max(floor, math.ceil(max_share * total / len(topic_list)))
+    allocation = {t: floor for t in topic_list}
+
+    # Water-filling: topics that hit the cap hand their excess back to the others
+    left = total - floor * len(topic_list)
+    open_topics = set(topic_list)
+    while left > 0 and open_topics:
+        # Same weights in the numerator and the sum, so the shares add up to `left`
+        w = {t: values[t] or 1e-9 for t in open_topics}
+        weight = sum(w.values())
+        shares = {t: left * w[t] / weight for t in open_topics}
+        handed_out = 0
+        for t in sorted(open_topics, key=lambda t: (-(shares[t] % 1), t)):
+            extra = min(int(shares[t]), cap - allocation[t])
+            allocation[t] += extra
+            handed_out += extra
+        # Rounding leftovers go to the largest remainders
+        for t in sorted(open_topics, key=lambda t: (-(shares[t] % 1), t)):
+            if handed_out >= left:
+                break
+            if allocation[t] < cap:
+                allocation[t] += 1
+                handed_out += 1
+        left -= handed_out
+        open_topics = {t for t in open_topics if allocation[t] < cap}
+        if not handed_out:
+            break
+    return allocation
+
+
+class RunBudget:
+    """
+    Token and wall-clock ceilings of one run. Past SCOUT_WIND_DOWN_AT of
+    either, no new topic starts; at the ceiling, queued work is dropped.
+    """
+
+    def __init__(self, max_tokens=SCOUT_MAX_TOKENS, max_minutes=SCOUT_MAX_MINUTES,
+                 wind_down_at=SCOUT_WIND_DOWN_AT):
+        self.max_tokens = max_tokens
+        self.max_seconds = max_minutes * 60
+        self.wind_down_at = wind_down_at
+        self.started = time.monotonic()
+        self._tokens_at_start = self._tokens()
+        self._announced = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _tokens():
+        totals = llm_metrics.usage_totals()
+        return totals["prompt_tokens"] + totals["output_tokens"]
+
+    def tokens_used(self):
+        return self._tokens() - self._tokens_at_start
+
+    def used(self):
+        """The larger of the token and time shares used (0 when there is no ceiling)."""
+        shares = [0.0]
+        if self.max_tokens:
+            shares.append(self.tokens_used() / self.max_tokens)
+        if self.max_seconds:
+            shares.append((time.monotonic() - self.started) / self.max_seconds)
+        return max(shares)
+
+    def _announce(self, state, message):
+        with self._lock:
+            if state in self._announced:
+                return
+            self._announced.add(state)
+        print(message)
+
+    def winding_down(self):
+        if self.used() < self.wind_down_at:
+            return False
+        self._announce("wind_down", f"   🪫 Run budget {self.used():.0%} used: no new topics, finishing in-flight work.")
+        return True
+
+    def exhausted(self):
+        if self.used() < 1.0:
+            return False
+        self._announce("exhausted", f"   🛑 Run budget used up ({self.tokens_used()} tokens, "
+                                    f"{time.monotonic() - self.started:.0f}s): dropping queued work.")
+        return True
+
+
+class RunPlan:
+    """
+    Which topics a run scans, in which order, with how many candidates each,
+    under which budget. Topics whose queued work was dropped are in `cut`.
+    """
+
+    def __init__(self, allocation, values, budget):
+        self.allocation = allocation
+        self.values = values
+        self.budget = budget
+        self.cut = set()
+        self._lock = threading.Lock()
+
+    @property
+    def order(self):
+        """Most valuable topics first, so a budget cut only costs the least promising ones."""
+        return sorted(self.allocation, key=lambda t: (-self.values[t], t))
+
+    def cut_topic(self, topic):
+        with self._lock:
+            self.cut.add(topic)
+
+    def print_plan(self, limit=None):
+        print(f"   🗓️ Plan: {sum(self.allocation.values())} candidates over {len(self.allocation)} topics"
+              + (f", ceiling {self.budget.max_tokens} tokens" if self.budget.max_tokens else "")
+              + (f", {self.budget.max_seconds / 60:.0f} min" if self.budget.max_seconds else ""))
+        for topic in self.order[:limit]:
+            print(f"      {topic[:34]:<34} {self.allocation[topic]:>4} candidates (value {self.values[topic]:.3f})")
+
+
+def plan_run(topic_list, total=None, history=None, budget=None):
+    """
+    Allocates the run's candidates over `topic_list` from past yields: `total`
+    if given, else SCOUT_RUN_CANDIDATES, else SCOUT_CANDIDATES_PER_TOPIC each.
+    """
+    topic_list = list(topic_list)
+    total = total or SCOUT_RUN_CANDIDATES or SCOUT_CANDIDATES_PER_TOPIC * len(topic_list)
+    history = load_history() if history is None else history
+    values = expected_values(topic_list, history)
+    return RunPlan(allocate(values, total), values, budget or RunBudget())
+
+
+if __name__ == "__main__":
+    import topics
+
+    parser = argparse.ArgumentParser(description="Show how the next scout run would spread its budget.")
+    parser.add_argument("command", choices=["plan"])
+    parser.add_argument("--total", type=int, default=None, help="Candidates for the run")
+    args = parser.parse_args()
+
+    topic_list = topics.ALL_TOPICS
+    plan = plan_run(topic_list, args.total)
+    plan.print_plan()
@@ -1,14 +1,26 @@
-import requests
+import asyncio
+import contextlib
 import datetime
 import random
+import threading
 import time
 import arxiv
 from typing import List
+from itertools import islice
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import os
 from google import genai
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
 import json
+import rate_limits
+import http_pool
+import review_cache
+import search_cache
+import llm_metrics
+import keyphrases
+import impact_model
 
 # Try/Except import for topics to prevent crash if file is missing locally
 try:
@@ -41,7 +53,12 @@ s2_api_key = os.getenv("S2_API_KEY")
 if not google_api_key:
     print("❌ ERROR: GOOGLE_API_KEY not found in .env or environment variables!")
 
-client = genai.Client(api_key=google_api_key)
+# Point at another Gemini-compatible endpoint (e.g. the benchmark stand-in)
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+
+client = genai.Client(
+    api_key=google_api_key,
+    http_options={'base_url': GEMINI_BASE_URL} if GEMINI_BASE_URL else None)
 
 # --- DATA SCHEMA ---
 
@@ -57,32 +74,35 @@ class QuickPaperReview(BaseModel):
         description="3-5 bullet points. Prioritize specific numbers/metrics if available, otherwise list core arguments or conclusions.")
     implications: List[str] = Field(
         description="2-3 bullet points on the practical, real-world consequences.")
-    # NEW FIELD: Title Highlights
-    title_highlights: List[str] = Field(
-        description="Extract 2-4 important technical terms or phrases that appear VERBATIM in the TITLE. Do not alter spelling."
-    )
+    # Title highlights are extracted locally (keyphrases.py), not by the model
+
+
+class IndexedPaperReview(QuickPaperReview):
+    index: int = Field(
+        description="The [PAPER n] index this review belongs to.")
+
+
+class BatchPaperReview(BaseModel):
+    reviews: List[IndexedPaperReview] = Field(
+        description="Exactly one review per paper, in any order, each tagged with its index.")
 
 # --- SHARED LOGIC (SEMANTIC SCHOLAR & ARXIV) ---
 
 
-def evaluate_paper(paper):
-    """
-    Core AI Analysis Function. 
-    Accepts a dictionary with 'title' and 'abstract'.
-    Returns structured JSON data or None.
-    """
-    if not paper.get('abstract'):
-        return None
+GEMINI_MODEL = 'gemini-2.0-flash'
 
-    print(f"🤖 AI Reviewing: '{paper['title'][:50]}...'")
+# Bump whenever EDITOR_INSTRUCTIONS or the review schema change,
+# so cached reviews from the old prompt are no longer reused.
+PROMPT_VERSION = 2
+
+# Papers per structured-output call in evaluate_papers_batch
+REVIEW_BATCH_SIZE = int(os.getenv("REVIEW_BATCH_SIZE", "8"))
+# Review batches of one feed curation in flight at the same time
+CURATE_PARALLEL_BATCHES = int(os.getenv("CURATE_PARALLEL_BATCHES", "3"))
 
-    prompt = f"""
+EDITOR_INSTRUCTIONS = """
     You are a ruthless Scientific Editor for "Peripheral News."
-    
-    Analyze this paper based on the following data:
-    - Title: {paper['title']}
-    - Abstract: {paper['abstract']}
-    
+
     ### TASK 1: THE FILTER (Score 1-10)
     Assign a 'score' based on impact:
     - 1-5: Insignificant (Internal academic chatter).
@@ -95,18 +115,108 @@ def evaluate_paper(paper):
     2. 'implications': A LIST of what this enables or why it matters.
     3. 'layman_summary': A simple summary.
     4. 'category': Classify into one domain (e.g. Bionics, AI, Materials).
-    5. 'title_highlights': Identify the most important technical keywords/entities found strictly within the TITLE.
     """
 
+
+def _review_cache_key(paper):
+    return review_cache.make_key(paper.get('title'), paper.get('abstract'),
+                                 PROMPT_VERSION, GEMINI_MODEL)
+
+
+def _cached_review(paper):
+    if not review_cache.REVIEW_CACHE_ENABLED:
+        return None
+    return review_cache.REVIEWS.get(_review_cache_key(paper))
+
+
+def _store_review(paper, review):
+    if not review:
+        return
+    key = _review_cache_key(paper)
+    if review_cache.REVIEW_CACHE_ENABLED:
+        review_cache.REVIEWS.put(key, review)
+    if review_cache.REVIEW_LOG_ENABLED:
+        review_cache.REVIEWS.log_label(key, paper.get('title'), paper.get('venue'), review['score'])
+
+
+# A throttled batch/paper is put back on the queue this many times before giving up
+GEMINI_MAX_REQUEUES = int(os.getenv("GEMINI_MAX_REQUEUES", "6"))
+
+
+class GeminiThrottled(Exception):
+    """Gemini answered 429 / RESOURCE_EXHAUSTED (or 503 overloaded)."""
+
+
+def _is_throttle_error(error):
+    # google.genai.errors.APIError carries the HTTP code and the RPC status
+    return (getattr(error, 'code', None) in (429, 503)
+            or getattr(error, 'status', None) in ("RESOURCE_EXHAUSTED", "UNAVAILABLE")
+            or "RESOURCE_EXHAUSTED" in str(error))
+
+
+def generate(prompt, schema, purpose="review", papers=1):
+    """
+    The ONE gate every Gemini call goes through: waits for a token from the
+    request-rate bucket and a slot from the adaptive concurrency limiter,
+    and feeds the outcome back to the limiter. Raises GeminiThrottled on
+    throttling so callers can re-queue the work.
+    Every call is recorded in the LLM metrics file (tokens, latency, outcome).
+    """
+    rate_limits.GEMINI_AIMD.acquire()
+    throttled = False
+    response = None
+    outcome = "error"
+    started = time.monotonic()
     try:
+        rate_limits.GEMINI_BUCKET.acquire()
+        started = time.monotonic()
         response = client.models.generate_content(
-            model='gemini-2.0-flash',
+            model=GEMINI_MODEL,
             contents=prompt,
             config={
                 'response_mime_type': 'application/json',
-                'response_schema': QuickPaperReview,
+                'response_schema': schema,
             }
         )
+        outcome = "ok" if response.parsed is not None else "parse_fail"
+        return response
+    except Exception as e:
+        if _is_throttle_error(e):
+            throttled = True
+            outcome = "throttled"
+            raise GeminiThrottled(str(e)) from e
+        raise
+    finally:
+        rate_limits.GEMINI_AIMD.release(throttled=throttled)
+        llm_metrics.record_call(GEMINI_MODEL, purpose, outcome,
+                                time.monotonic() - started, response, papers)
+
+
+def evaluate_paper(paper):
+    """
+    Core AI Analysis Function. 
+    Accepts a dictionary with 'title' and 'abstract'.
+    Returns structured JSON data or None.
+    Reviews are served from the local review cache when available, and
+    throttled calls are retried instead of dropped.
+    """
+    if not paper.get('abstract'):
+        return None
+    return evaluate_papers_batch([paper])[0]
+
+
+def _evaluate_uncached(paper):
+    """Single-paper review. Returns the review or None; raises GeminiThrottled."""
+    print(f"🤖 AI Reviewing: '{paper['title'][:50]}...'")
+
+    prompt = f"""{EDITOR_INSTRUCTIONS}
+    Analyze this paper based on the following data:
+    - Title: {paper['title']}
+    - Abstract: {paper['abstract']}
+    """
+
+    try:
+        response = generate(prompt, QuickPaperReview)
         result = response.parsed.model_dump()
 
         if result['score'] >= 7:
@@ -115,43 +225,293 @@ def evaluate_paper(paper):
 
         return result
 
+    except GeminiThrottled:
+        raise
     except Exception as e:
         print(f"❌ AI Review failed: {e}")
         return None
 
+
+def _review_batch(papers):
+    """
+    Reviews several papers in ONE structured-output call.
+    Returns {index: review_dict} for every paper the model answered for.
+    Raises if the response could not be parsed at all.
+    """
+    paper_blocks = "\n".join(
+        f"""
+    [PAPER {i}]
+    - Title: {paper['title']}
+    - Abstract: {paper['abstract']}"""
+        for i, paper in enumerate(papers))
+
+    prompt = f"""{EDITOR_INSTRUCTIONS}
+    Apply both tasks to EACH of the {len(papers)} papers below, independently.
+    Return one review per paper and set 'index' to the paper's [PAPER n] number.
+    {paper_blocks}
+    """
+
+    response = generate(prompt, BatchPaperReview, "review_batch", len(papers))
+    if response.parsed is None:
+        raise ValueError("Batch response did not match the schema")
+
+    reviews = {}
+    for item in response.parsed.reviews:
+        review = item.model_dump()
+        index = review.pop('index')
+        # Ignore hallucinated or repeated indices, keep the first answer
+        if 0 <= index < len(papers) and index not in reviews:
+            reviews[index] = review
+    return reviews
+
+
+def _call_after_backoff(call, chunk, attempt):
+    if attempt:
+        # Re-queued after throttling: back off before trying again
+        time.sleep(random.uniform(0, min(30.0, 2.0 ** attempt)))
+    return call(chunk)
+
+
+def run_gemini_batches(chunks, call, on_result, workers, in_flight=None, cancel=None):
+    """
+    The throttle-aware driver of every batched Gemini job. Runs `call(chunk)`
+    on `workers` threads for each chunk of `chunks` (pulled lazily, at most
+    `in_flight` at once). `call` returns (result, throttled items of the
+    chunk); throttled items are re-queued as a chunk of their own, after a
+    randomized exponential backoff, up to GEMINI_MAX_REQUEUES times.
+    `on_result(chunk, result)` runs in the calling thread as each call ends.
+    Once `cancel` (a threading.Event) is set, nothing new is sent.
+    """
+    chunks = iter(chunks)
+    in_flight = in_flight or workers
+    retry = deque()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        running = {}
+        while True:
+            while len(running) < in_flight and not (cancel is not None and cancel.is_set()):
+                chunk, attempt = retry.popleft() if retry else (next(chunks, None), 0)
+                if chunk is None:
+                    break
+                future = llm_metrics.submit(pool, _call_after_backoff, call, chunk, attempt)
+                running[future] = (chunk, attempt)
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk, attempt = running.pop(future)
+                result, throttled = future.result()
+                on_result(chunk, result)
+                if not throttled:
+                    continue
+                if attempt < GEMINI_MAX_REQUEUES:
+                    print(f"🔁 Re-queueing {len(throttled)} throttled papers "
+                          f"(attempt {attempt + 1}/{GEMINI_MAX_REQUEUES}).")
+                    retry.append((list(throttled), attempt + 1))
+                else:
+                    print(f"❌ Giving up on {len(throttled)} papers after "
+                          f"{GEMINI_MAX_REQUEUES} throttled retries.")
+
+
+def _review_chunk(papers, cancel=None):
+    """
+    Reviews one chunk: a single batch call, then single calls for any paper
+    the batch did not cover. Returns ({local_index: review}, [throttled local indices]).
+    Returns nothing once `cancel` (a threading.Event) is set.
+    """
+    if cancel is not None and cancel.is_set():
+        return {}, []
+
+    reviews = {}
+    if len(papers) > 1:
+        print(f"🤖 AI Batch Reviewing {len(papers)} papers...")
+        try:
+            reviews = _review_batch(papers)
+        except GeminiThrottled:
+            return {}, list(range(len(papers)))
+        except Exception as e:
+            print(f"⚠️ Batch review failed ({e}). Falling back to single reviews.")
+
+    for review in reviews.values():
+        if review['score'] >= 7:
+            print(
+                f"   🔥 HIGH IMPACT (Score {review['score']}): {review['layman_summary']}")
+
+    throttled = []
+    for i, paper in enumerate(papers):
+        if i in reviews:
+            continue
+        if cancel is not None and cancel.is_set():
+            break
+        try:
+            reviews[i] = _evaluate_uncached(paper)
+        except GeminiThrottled:
+            throttled.append(i)
+    return reviews, throttled
+
+
+def evaluate_papers_batch(papers, batch_size=None, cancel=None):
+    """
+    Batch version of evaluate_paper.
+    Accepts a list of dictionaries with 'title' and 'abstract' and returns a
+    list of the same length: the review dict for each paper, or None.
+    Cached reviews are reused; the rest are sent in chunks of `batch_size`
+    per Gemini request, run in parallel as far as the adaptive limiter
+    allows. Any paper missing from a (possibly malformed) batch response is
+    retried on its own, and throttled papers are re-queued.
+    Once `cancel` (a threading.Event) is set, no further Gemini calls are
+    made and the papers not reviewed yet stay None.
+    """
+    batch_size = batch_size or REVIEW_BATCH_SIZE
+    results = [None] * len(papers)
+    pending = []
+    for i, paper in enumerate(papers):
+        if not paper.get('abstract'):
+            continue
+        results[i] = _cached_review(paper)
+        if results[i] is None:
+            pending.append(i)
+    cache_hits = sum(r is not None for r in results)
+    if cache_hits:
+        print(f"🗃️ {cache_hits} reviews served from cache.")
+    if not pending:
+        return results
+
+    # Chunks are lists of paper indices
+    chunks = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)]
+
+    def review(chunk):
+        reviews, throttled = _review_chunk([papers[i] for i in chunk], cancel)
+        return {chunk[k]: r for k, r in reviews.items()}, [chunk[k] for k in throttled]
+
+    def store(chunk, reviews):
+        for i, review in reviews.items():
+            _store_review(papers[i], review)
+            results[i] = review
+
+    run_gemini_batches(chunks, review, store, workers=min(rate_limits.GEMINI_MAX_CONCURRENCY, len(chunks)),
+                       cancel=cancel)
+    return results
+
 # --- SEMANTIC SCHOLAR (FEED) LOGIC ---
 
 
-def fetch_with_retry(url, params, retries=3, backoff_factor=2):
+# Overridable so the benchmark can run against a local stand-in
+S2_API_BASE = os.getenv("S2_API_BASE", "https://api.semanticscholar.org/graph/v1").rstrip("/")
+S2_SEARCH_URL = f"{S2_API_BASE}/paper/search"
+S2_BULK_SEARCH_URL = f"{S2_API_BASE}/paper/search/bulk"
+S2_BATCH_URL = f"{S2_API_BASE}/paper/batch"
+S2_BATCH_MAX_IDS = 500
+
+# One pooled keep-alive client for every Semantic Scholar call in this process
+s2_http = http_pool.PooledClient(
+    "api.semanticscholar.org",
+    headers={"x-api-key": s2_api_key} if s2_api_key else {},
+    limiter=rate_limits.S2_BUCKET,
+    backoff_base=2.0,
+)
+
+# Paging caps for the lazy fetcher: how far a feed may dig to fill its quota
+FEED_MAX_PAGES = int(os.getenv("FEED_MAX_PAGES", "5"))
+
+
+def _get_json(url, params, retries=3, json_body=None):
+    """
+    Calls a Semantic Scholar endpoint and returns the decoded body, or None.
+    Sends a POST when `json_body` is given (batch endpoints), else a GET.
+    Retries (429/5xx/timeouts, honoring Retry-After) happen in the pooled client.
+    """
+    if json_body is not None:
+        response = s2_http.post(url, params=params, json=json_body, retries=retries)
+    else:
+        response = s2_http.get(url, params=params, retries=retries)
+
+    if response is None:
+        print("❌ Network Exception: Semantic Scholar unreachable.")
+        return None
+    if response.status_code == 200:
+        return response.json()
+    if response.status_code == 403:
+        print("❌ 403 Forbidden: Your S2_API_KEY might be invalid.")
+    else:
+        print(f"❌ Error: Status Code {response.status_code}")
+    return None
+
+
+def fetch_with_retry(url, params, retries=3):
     print(
         f"📡 Connecting to Semantic Scholar... (Query: {params.get('query')})")
-    headers = {}
-    if s2_api_key:
-        headers["x-api-key"] = s2_api_key
+    body = _get_json(url, params, retries)
+    if body is None:
+        return []
+    data = body.get('data', [])
+    print(f"✅ Connection successful. Retrieved {len(data)} raw papers.")
+    return data
 
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, params=params, headers=headers)
 
-            if response.status_code == 200:
-                data = response.json().get('data', [])
-                print(
-                    f"✅ Connection successful. Retrieved {len(data)} raw papers.")
-                return data
-            elif response.status_code == 429:
-                wait_time = (backoff_factor ** attempt) + random.uniform(0, 1)
-                print(f"⚠️ Rate limited. Waiting {wait_time:.1f}s...")
-                time.sleep(wait_time)
-            elif response.status_code == 403:
-                print("❌ 403 Forbidden: Your S2_API_KEY might be invalid.")
-                return []
-            else:
-                print(f"❌ Error: Status Code {response.status_code}")
-                return []
-        except Exception as e:
-            print(f"❌ Network Exception: {e}")
-            return []
-    return []
+class SemanticScholarUnavailable(Exception):
+    """A Semantic Scholar request failed for good (after the pooled client's retries)."""
+
+
+def iter_semantic_scholar(url, params, page_size=20, max_pages=FEED_MAX_PAGES, raise_errors=False):
+    """
+    Lazily yields papers from /paper/search (offset paging) or
+    /paper/search/bulk (continuation token), one page at a time.
+    Stops when results run out or after `max_pages` requests; the caller
+    can stop earlier simply by not pulling any more papers.
+    A failed request ends the stream quietly, or raises
+    SemanticScholarUnavailable with `raise_errors`.
+    """
+    params = dict(params)
+    bulk = url.rstrip("/").endswith("/bulk")
+    if bulk:
+        # The bulk endpoint has a fixed page size and pages with a token
+        params.pop("limit", None)
+    else:
+        params["limit"] = page_size
+        params["offset"] = params.get("offset", 0)
+
+    for page in range(max_pages):
+        print(
+            f"📡 Semantic Scholar page {page + 1}... (Query: {params.get('query')})")
+        body = _get_json(url, params)
+        if body is None and raise_errors:
+            raise SemanticScholarUnavailable(f"page {page + 1} of '{params.get('query')}'")
+        if not body:
+            return
+        data = body.get('data') or []
+        yield from data
+
+        if bulk:
+            if not body.get('token'):
+                return
+            params["token"] = body['token']
+        else:
+            # 'next' is absent on the last page
+            if not data or 'next' not in body:
+                return
+            params["offset"] = body['next']
+
+
+def fetch_paper_batch(ids, fields="citationCount"):
+    """
+    Looks up to 500 papers in ONE request via POST /paper/batch.
+    `ids` may be S2 paperIds or prefixed ids ('DOI:...', 'ARXIV:...').
+    Returns a list aligned with `ids` (None where S2 has no match),
+    or None if the request failed.
+    """
+    if len(ids) > S2_BATCH_MAX_IDS:
+        raise ValueError(f"/paper/batch accepts at most {S2_BATCH_MAX_IDS} ids")
+    return _get_json(S2_BATCH_URL, {"fields": fields}, json_body={"ids": list(ids)})
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 
 def resolve_best_url(paper):
@@ -173,71 +533,243 @@ def resolve_best_url(paper):
     return paper.get('url')
 
 
-def get_curated_feed(topic=None, limit=5):
+def _to_feed_entry(paper, review):
+    """Standardizes a Semantic Scholar paper + AI review into a feed/DB object."""
+    author_list = paper.get('authors', [])
+    author_str = ", ".join(
+        [a['name'] for a in author_list[:2]]) if author_list else "Unknown"
+
+    entry = {
+        "title": paper['title'],
+        "date": paper.get('publicationDate', 'Recent'),
+        "authors": author_str,
+        "summary": review['layman_summary'],
+        "url": resolve_best_url(paper),
+        "journal": paper.get('venue') or "Journal",
+        "score": review['score'],
+        "category": review['category'],
+        "paperId": paper.get('paperId'),
+        "key_findings": review.get('key_findings', []),
+        "implications": review.get('implications', []),
+        "title_highlights": keyphrases.extract(paper['title'])
+    }
+    # Only requested by the historical feed (column added in citations_setup.sql)
+    if paper.get('citationCount') is not None:
+        entry["citationCount"] = paper['citationCount']
+    return entry
+
+
+def _curate(raw_papers, min_score, limit, known=None, max_reviews=None, on_examined=None):
+    """
+    Pulls papers from `raw_papers` (any iterable, usually a lazy page
+    stream) and reviews them in batches until `limit` papers scored at
+    least `min_score`, the stream runs dry, or `max_reviews` papers have
+    been sent to the AI. Returns [(paper, review)] for the keepers.
+    Up to CURATE_PARALLEL_BATCHES batches are reviewed at once, but results
+    are consumed in stream order, so the keepers are deterministic. Once
+    `limit` is reached, batches still waiting for Gemini are cancelled.
+    `on_examined(paper)` is called, in stream order, for every paper that
+    was fully dealt with (reviewed, or skipped as known or pre-filtered)
+    before curation stopped; it is never called again after the first paper
+    that got no review.
+    """
+    max_reviews = max_reviews or limit * 6
+    kept = []
+    reviewed = 0
+    unreviewed = False
+    chunks = batched(raw_papers, REVIEW_BATCH_SIZE)
+    pending = deque()
+    cancel = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=CURATE_PARALLEL_BATCHES)
+
+    def prepare(chunk):
+        """Filters one chunk and starts reviewing its candidates in the background."""
+        nonlocal reviewed
+        candidates = [p for p in chunk if p.get('abstract')]
+        if known is not None:
+            new_candidates = known.filter_new(candidates)
+            if len(new_candidates) < len(candidates):
+                print(
+                    f"   ♻️ Skipping {len(candidates) - len(new_candidates)} papers already in DB.")
+            candidates = new_candidates
+        llm_metrics.record_candidates(len(candidates))
+        candidates, flagged = impact_model.PREFILTER.screen(candidates, min_score=min_score)
+
+        # Never review more than the budget allows
+        over_budget = {id(p) for p in candidates[max(0, max_reviews - reviewed):]}
+        candidates = [p for p in candidates if id(p) not in over_budget]
+        reviewed += len(candidates)
+
+        future = llm_metrics.submit(
+            pool, evaluate_papers_batch, candidates, None, cancel) if candidates else None
+        return chunk, candidates, future, flagged, over_budget
+
+    try:
+        while True:
+            # Keep the next batches reviewing while this one is consumed
+            while len(pending) < CURATE_PARALLEL_BATCHES and not (pending and pending[-1][4]):
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(prepare(chunk))
+            if not pending:
+                return kept
+
+            chunk, candidates, future, flagged, over_budget = pending.popleft()
+            reviews = future.result() if future else []
+            review_by_paper = {id(p): r for p, r in zip(candidates, reviews)}
+
+            for paper in chunk:
+                if id(paper) in over_budget:
+                    print(f"   💸 Review budget reached ({max_reviews} papers).")
+                    return kept
+
+                if id(paper) in review_by_paper:
+                    review = review_by_paper[id(paper)]
+                    if review is None:
+                        # Throttled or failed: a later run must see this paper again
+                        unreviewed = True
+                    elif review['score'] >= min_score:
+                        impact_model.PREFILTER.record_kept(paper, flagged)
+                        llm_metrics.record_kept()
+                        kept.append((paper, review))
+                    else:
+                        print("   🗑️ Discarding (Low Impact)")
+
+                if on_examined and not unreviewed:
+                    on_examined(paper)
+                if len(kept) >= limit:
+                    return kept
+    finally:
+        # Outstanding batches stop before their next Gemini call
+        cancel.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _recent_papers_stream(topic, page_size, max_pages=FEED_MAX_PAGES, watermark=None, per_run=None):
+    """
+    Returns (lazy stream of recent S2 papers for a topic, on_examined callback).
+    With a watermark (watermarks.Watermark), only papers published since the
+    topic's last run are read, oldest first, and on_examined advances it.
+    When far more than `per_run` papers are waiting, the watermark first
+    skips ahead to the newest of them (Watermark.skip_backlog).
+    """
+    current_year = datetime.datetime.now().year
+    fields = "title,abstract,url,publicationDate,venue,authors,paperId,openAccessPdf,externalIds"
+
+    if watermark is None:
+        params = {
+            "query": topic,
+            "year": f"{current_year-1}-{current_year}",
+            "sort": "publicationDate:desc",
+            "fields": fields,
+        }
+        return iter_semantic_scholar(S2_SEARCH_URL, params, page_size=page_size, max_pages=max_pages), None
+
+    # Incremental mode: the bulk endpoint can filter and sort by date
+    since = watermark.since()
+    if per_run:
+        # Newest first, dates only: where the last few runs' worth of papers starts
+        body = _get_json(S2_BULK_SEARCH_URL, {"query": topic, "publicationDateOrYear": f"{since}:",
+                                              "sort": "publicationDate:desc", "fields": "publicationDate"})
+        if body:
+            dates = [p['publicationDate'] for p in body.get('data') or [] if p.get('publicationDate')]
+            since = watermark.skip_backlog(dates, body.get('total') or 0, per_run) or since
+    print(f"   🌊 Reading '{topic}' papers published since {since}")
+    params = {
+        "query": topic,
+        "publicationDateOrYear": f"{since}:",
+        "sort": "publicationDate:asc",
+        "fields": fields,
+    }
+    stream = iter_semantic_scholar(S2_BULK_SEARCH_URL, params, max_pages=max_pages)
+    return (p for p in stream if not watermark.is_seen(p)), watermark.advance
+
+
+def get_curated_feed(topic=None, limit=5, known=None, max_pages=FEED_MAX_PAGES, watermark=None):
+    """
+    Fetches recent papers for a topic and keeps the high-impact ones.
+    Pages through the search results lazily until `limit` keepers are found.
+    If `known` (a dedupe.KnownPapers) is given, papers already in the
+    database are dropped before they reach the AI.
+    If `watermark` (a watermarks.Watermark) is given, only papers published
+    since the topic's last run are read, and the watermark is advanced past
+    every paper examined.
+    """
     if not topic:
         topic = random.choice(topics.ALL_TOPICS)
         print(f"\n🎲 AUTO-SCOUT ACTIVATED: Scouting topic '{topic}'")
     else:
         print(f"\n🎯 TARGETED SCOUT: Scouting topic '{topic}'")
 
-    url = "https://api.semanticscholar.org/graph/v1/paper/search"
-    current_year = datetime.datetime.now().year
+    raw_papers, on_examined = _recent_papers_stream(
+        topic, page_size=limit * 2, max_pages=max_pages, watermark=watermark,
+        per_run=limit * 6)
+    curated_papers = []
 
-    params = {
-        "query": topic,
-        "year": f"{current_year-1}-{current_year}",
-        "sort": "publicationDate:desc",
-        "fields": "title,abstract,url,publicationDate,venue,authors,paperId,openAccessPdf,externalIds",
-        "limit": limit * 2
-    }
+    # Filter by Score for Semantic Scholar Feed
+    with llm_metrics.context(topic=topic):
+        keepers = _curate(raw_papers, min_score=7, limit=limit, known=known,
+                          on_examined=on_examined)
+    for paper, review in keepers:
+        print("   🔥 KEEPING PAPER (High Impact)")
+        curated_papers.append(_to_feed_entry(paper, review))
 
-    raw_papers = fetch_with_retry(url, params)
-    curated_papers = []
+    return curated_papers
 
-    for paper in raw_papers:
-        if not paper.get('abstract'):
-            continue
 
-        review = evaluate_paper(paper)
-
-        # Filter by Score for Semantic Scholar Feed
-        if review and review['score'] >= 7:
-            print("   🔥 KEEPING PAPER (High Impact)")
-
-            author_list = paper.get('authors', [])
-            author_str = ", ".join(
-                [a['name'] for a in author_list[:2]]) if author_list else "Unknown"
-
-            direct_url = resolve_best_url(paper)
-
-            curated_papers.append({
-                "title": paper['title'],
-                "date": paper.get('publicationDate', 'Recent'),
-                "authors": author_str,
-                "summary": review['layman_summary'],
-                "url": direct_url,
-                "journal": paper.get('venue') or "Journal",
-                "score": review['score'],
-                "category": review['category'],
-                "paperId": paper.get('paperId'),
-                "key_findings": review.get('key_findings', []),
-                "implications": review.get('implications', []),
-                "title_highlights": review.get('title_highlights', [])  # ADDED
-            })
-        else:
-            print("   🗑️ Discarding (Low Impact)")
+def collect_candidates(topic, max_candidates, known=None, max_pages=FEED_MAX_PAGES, watermark=None):
+    """
+    Collects up to `max_candidates` recent, not-yet-stored papers with an
+    abstract for a topic WITHOUT reviewing them, so a multi-topic run can
+    merge candidates across topics before paying for any AI call.
+    """
+    if max_candidates <= 0:
+        return []
+    raw_papers, on_examined = _recent_papers_stream(
+        topic, page_size=max_candidates, max_pages=max_pages, watermark=watermark,
+        per_run=max_candidates)
+    candidates = []
 
-        if len(curated_papers) >= limit:
+    for paper in raw_papers:
+        if paper.get('abstract') and not (known is not None and known.is_known(paper)):
+            candidates.append(paper)
+        if on_examined:
+            on_examined(paper)
+        if len(candidates) >= max_candidates:
             break
 
-    return curated_papers
+    return candidates
 
 
-def get_historical_feed(topic, year_start=2015, limit=5):
+def review_candidates(papers, min_score=7):
+    """
+    Reviews already-collected papers (pre-filter + batched AI review).
+    Returns ([(paper, feed_entry)] for the ones scoring at least `min_score`,
+    number of papers that got no review because Gemini failed or throttled).
+    """
+    llm_metrics.record_candidates(len(papers))
+    papers, flagged = impact_model.PREFILTER.screen(papers, min_score=min_score)
+    kept = []
+    unreviewed = 0
+    for paper, review in zip(papers, evaluate_papers_batch(papers)):
+        if review is None:
+            unreviewed += 1
+        elif review['score'] >= min_score:
+            impact_model.PREFILTER.record_kept(paper, flagged)
+            kept.append((paper, _to_feed_entry(paper, review)))
+    llm_metrics.record_kept(len(kept))
+    return kept, unreviewed
+
+
+def get_historical_feed(topic, year_start=2015, limit=5, max_pages=FEED_MAX_PAGES):
+    """
+    The most cited papers of a topic since `year_start` that the AI rates
+    at least 6. Returns None (not []) when Semantic Scholar could not be read.
+    """
     print(
         f"\n🏛️ HISTORICAL ARCHIVE: Scouting '{topic}' ({year_start}-Present)...")
 
-    url = "https://api.semanticscholar.org/graph/v1/paper/search"
     current_year = datetime.datetime.now().year
 
     params = {
@@ -245,93 +777,142 @@ def get_historical_feed(topic, year_start=2015, limit=5):
         "year": f"{year_start}-{current_year}",
         "sort": "citationCount:desc",
         "fields": "title,abstract,url,publicationDate,venue,authors,paperId,citationCount,openAccessPdf,externalIds",
-        "limit": limit * 2
     }
 
-    raw_papers = fetch_with_retry(url, params)
+    raw_papers = iter_semantic_scholar(
+        S2_SEARCH_URL, params, page_size=limit * 2, max_pages=max_pages, raise_errors=True)
     curated_papers = []
 
-    for paper in raw_papers:
-        if not paper.get('abstract'):
-            continue
-
-        review = evaluate_paper(paper)
-
-        if review and review['score'] >= 6:
-            print(
-                f"   🏛️ KEEPING CLASSIC (Cited {paper.get('citationCount', '?')} times)")
-            author_list = paper.get('authors', [])
-            author_str = ", ".join(
-                [a['name'] for a in author_list[:2]]) if author_list else "Unknown"
-
-            direct_url = resolve_best_url(paper)
-
-            curated_papers.append({
-                "title": paper['title'],
-                "date": paper.get('publicationDate', 'Recent'),
-                "authors": author_str,
-                "summary": review['layman_summary'],
-                "url": direct_url,
-                "journal": paper.get('venue') or "Journal",
-                "score": review['score'],
-                "category": review['category'],
-                "paperId": paper.get('paperId'),
-                "key_findings": review.get('key_findings', []),
-                "implications": review.get('implications', []),
-                "title_highlights": review.get('title_highlights', [])  # ADDED
-            })
-
-        if len(curated_papers) >= limit:
-            break
+    try:
+        with llm_metrics.context(topic=topic):
+            keepers = _curate(raw_papers, min_score=6, limit=limit)
+    except SemanticScholarUnavailable as e:
+        print(f"   ❌ Semantic Scholar unavailable ({e}).")
+        return None
+    for paper, review in keepers:
+        print(
+            f"   🏛️ KEEPING CLASSIC (Cited {paper.get('citationCount', '?')} times)")
+        curated_papers.append(_to_feed_entry(paper, review))
 
     return curated_papers
 
 # --- ARXIV LOGIC (UPDATED) ---
 
 
+def _arxiv_results(query, max_results):
+    search = arxiv.Search(query=query, max_results=max_results,
+                          sort_by=arxiv.SortCriterion.SubmittedDate)
+    return list(search.results())
+
+
+def _arxiv_paper_data(result):
+    """Prepares an arXiv result for the existing AI Evaluator."""
+    return {
+        "title": result.title,
+        "abstract": result.summary.replace("\n", " ")
+    }
+
+
+def _arxiv_entry(result, review):
+    """Standardizes an arXiv result + AI review into a feed/DB object."""
+    return {
+        "title": result.title,
+        "date": result.published.strftime("%Y-%m-%d"),
+        "authors": ", ".join([a.name for a in result.authors[:3]]),
+        # Use AI summary (cleaner)
+        "summary": review['layman_summary'],
+        "link": result.pdf_url,
+        "journal": "arXiv Pre-print",
+        "score": review['score'],
+        "category": review['category'],
+        # 🚀 FIX: These are now populated by the AI
+        "key_findings": review.get('key_findings', []),
+        "implications": review.get('implications', []),
+        "title_highlights": keyphrases.extract(result.title)
+    }
+
+
 def search_arxiv(query, max_results=6):
     """
     Searches ArXiv and passes results through the AI Evaluator 
     to ensure 'key_findings' and 'implications' are generated.
+    Results are shared across sessions through the process-wide search cache.
     """
+    return search_cache.SEARCHES.search(
+        _search_cache_query(query, max_results),
+        lambda _: _search_arxiv_uncached(query, max_results))
+
+
+def _search_cache_query(query, max_results):
+    return f"{query} [{max_results}]"
+
+
+def _search_arxiv_uncached(query, max_results):
+    """Returns (entries of the reviewed results, whether every result got a review)."""
     print(f"🔎 Searching ArXiv for: '{query}'")
-    search = arxiv.Search(query=query, max_results=max_results,
-                          sort_by=arxiv.SortCriterion.SubmittedDate)
     results = []
+    complete = False
 
     try:
-        for result in search.results():
-            # 1. Prepare data for the existing AI Evaluator
-            paper_data = {
-                "title": result.title,
-                "abstract": result.summary.replace("\n", " ")
-            }
+        arxiv_results = _arxiv_results(query, max_results)
 
-            # 2. Get Structured Data (Key Findings, Score, etc.)
-            review = evaluate_paper(paper_data)
+        # Get Structured Data (Key Findings, Score, etc.) in one batch
+        with llm_metrics.context(entry_point="arxiv_search"):
+            reviews = evaluate_papers_batch([_arxiv_paper_data(r) for r in arxiv_results])
 
+        for result, review in zip(arxiv_results, reviews):
             if review:
-                # 3. Standardize Object for Database
-                results.append({
-                    "title": result.title,
-                    "date": result.published.strftime("%Y-%m-%d"),
-                    "authors": ", ".join([a.name for a in result.authors[:3]]),
-                    # Use AI summary (cleaner)
-                    "summary": review['layman_summary'],
-                    "link": result.pdf_url,
-                    "journal": "arXiv Pre-print",
-                    "score": review['score'],
-                    "category": review['category'],
-                    # 🚀 FIX: These are now populated by the AI
-                    "key_findings": review.get('key_findings', []),
-                    "implications": review.get('implications', []),
-                    # ADDED
-                    "title_highlights": review.get('title_highlights', [])
-                })
+                results.append(_arxiv_entry(result, review))
+        complete = len(results) == len(arxiv_results)
         print(f"✅ Found and Analyzed {len(results)} results on ArXiv.")
 
     except Exception as e:
         print(f"❌ ArXiv Error: {e}")
         pass
 
-    return results
+    return results, complete
+
+
+async def stream_arxiv(query, max_results=6):
+    """
+    Streaming variant of search_arxiv for the UI.
+    Reviews every result concurrently and yields (done, total, entry) as
+    soon as each review finishes; entry is None when a paper could not be
+    reviewed. Cached searches replay at once, and identical searches
+    running at the same time share one stream. Once every consumer has
+    closed the generator (or cancelled its task), the reviews that have
+    not reached Gemini yet are stopped.
+    """
+    stream = search_cache.SEARCHES.stream(
+        _search_cache_query(query, max_results),
+        lambda _: _stream_arxiv_uncached(query, max_results))
+    async with contextlib.aclosing(stream) as results:
+        async for item in results:
+            yield item
+
+
+async def _stream_arxiv_uncached(query, max_results):
+    print(f"🔎 Streaming ArXiv search for: '{query}'")
+    try:
+        arxiv_results = await asyncio.to_thread(_arxiv_results, query, max_results)
+    except Exception as e:
+        print(f"❌ ArXiv Error: {e}")
+        return
+
+    cancelled = threading.Event()
+
+    def review(result):
+        if cancelled.is_set():
+            return result, None
+        with llm_metrics.context(entry_point="arxiv_search"):
+            return result, evaluate_paper(_arxiv_paper_data(result))
+
+    tasks = [asyncio.ensure_future(asyncio.to_thread(review, r)) for r in arxiv_results]
+    try:
+        for done, next_review in enumerate(asyncio.as_completed(tasks), 1):
+            result, review_data = await next_review
+            yield done, len(tasks), _arxiv_entry(result, review_data) if review_data else None
+    finally:
+        cancelled.set()
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,76 @@
+-- Work leases for distributed scout workers (see leases.py). Safe to re-run.
+-- One row per (run, unit); a unit is a topic. A worker owns a unit until
+-- expires_at; a crashed worker stops heartbeating and its units are claimed again.
+create table if not exists scout_leases (
+  run_id text not null,
+  unit text not null,
+  worker text,                           -- current (or last) owner
+  expires_at timestamp with time zone,   -- lease end, pushed forward by heartbeats
+  done_at timestamp with time zone,      -- set once the unit is fully persisted
+  attempts integer not null default 0,   -- claims so far (crash loops give up)
+  primary key (run_id, unit)
+);
+
+-- Only the service role (the scout) reads or writes leases
+alter table scout_leases enable row level security;
+
+-- Registers the run's units (first caller wins) and atomically leases one
+-- unit that is not done and not held, in p_units order (the scout passes its
+-- most promising topics first). Returns the unit, or NULL when none is left.
+create or replace function claim_scout_lease(p_run_id text, p_worker text, p_units text[],
+                                             p_lease_seconds integer, p_max_attempts integer)
+returns text as $$
+declare
+  claimed text;
+begin
+  insert into scout_leases (run_id, unit)
+  select p_run_id, u from unnest(p_units) as u
+  on conflict do nothing;
+
+  update scout_leases l set
+    worker = p_worker,
+    expires_at = now() + make_interval(secs => p_lease_seconds),
+    attempts = l.attempts + 1
+  where (l.run_id, l.unit) = (
+    select run_id, unit from scout_leases
+    where run_id = p_run_id
+      and done_at is null
+      and attempts < p_max_attempts
+      and (worker is null or expires_at < now())
+    order by attempts, array_position(p_units, unit)
+    limit 1
+    for update skip locked)
+  returning l.unit into claimed;
+
+  return claimed;
+end;
+$$ language plpgsql security definer;
+
+-- Extends the worker's leases on p_units. Returns the units it still holds
+-- (a unit missing from the answer was reclaimed by another worker).
+create or replace function heartbeat_scout_leases(p_run_id text, p_worker text, p_units text[],
+                                                  p_lease_seconds integer)
+returns text[] as $$
+  with extended as (
+    update scout_leases set expires_at = now() + make_interval(secs => p_lease_seconds)
+    where run_id = p_run_id and worker = p_worker and done_at is null and unit = any(p_units)
+    returning unit
+  )
+  select coalesce(array_agg(unit), '{}') from extended;
+$$ language sql security definer;
+
+-- Marks a unit done, only if the worker still owns it
+create or replace function complete_scout_lease(p_run_id text, p_worker text, p_unit text)
+returns boolean as $$
+  with finished as (
+    update scout_leases set done_at = now(), expires_at = null
+    where run_id = p_run_id and unit = p_unit and worker = p_worker and done_at is null
+    returning unit
+  )
+  select count(*) > 0 from finished;
+$$ language sql security definer;
+
+-- Only the service role (scripts) may call them
+revoke execute on function claim_scout_lease(text, text, text[], integer, integer) from public, anon, authenticated;
+revoke execute on function heartbeat_scout_leases(text, text, text[], integer) from public, anon, authenticated;
+revoke execute on function complete_scout_lease(text, text, text) from public, anon, authenticated;
@@ -0,0 +1,194 @@
+import asyncio
+import contextlib
+import json
+import os
+import threading
+from cachetools import TTLCache
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIG ---
+SEARCH_CACHE_TTL_SECONDS = int(os.getenv("SEARCH_CACHE_TTL_SECONDS", "3600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+
+
+def normalize_query(query):
+    """'  Fusion  Energy' and 'fusion energy' are the same search."""
+    return " ".join((query or "").lower().split())
+
+
+class _Flight:
+    """
+    One in-progress streaming search, shared by every session that asked
+    for the same query. Items are kept so late joiners replay from the start.
+    The search is cancelled only when its last follower goes away.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.finished = False
+        self.completed = False
+        self.followers = 0
+        self.task = None
+        self._changed = asyncio.Condition()
+
+    async def run(self, stream, on_done):
+        try:
+            async with contextlib.aclosing(stream) as results:
+                async for item in results:
+                    async with self._changed:
+                        self.items.append(item)
+                        self._changed.notify_all()
+            self.completed = True
+        finally:
+            self.finished = True
+            on_done(self)
+            async with self._changed:
+                self._changed.notify_all()
+
+    async def follow(self):
+        self.followers += 1
+        seen = 0
+        try:
+            while True:
+                async with self._changed:
+                    await self._changed.wait_for(
+                        lambda: len(self.items) > seen or self.finished)
+                    new_items = self.items[seen:]
+                    finished = self.finished
+                for item in new_items:
+                    seen += 1
+                    yield item
+                if finished and seen == len(self.items):
+                    return
+        finally:
+            self.followers -= 1
+            if self.followers == 0 and not self.finished:
+                self.task.cancel()
+
+
+class SearchCache:
+    """
+    Process-wide cache of search results keyed by normalized query, with
+    TTL expiry and LRU eviction (cachetools.TTLCache). Identical searches
+    running at the same time share one computation (single-flight).
+    """
+
+    def __init__(self, max_entries=SEARCH_CACHE_MAX_ENTRIES, ttl=SEARCH_CACHE_TTL_SECONDS):
+        self._results = TTLCache(maxsize=max_entries, ttl=ttl)
+        self._flights = {}
+        self._sync_flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+
+    def get(self, query):
+        with self._lock:
+            results = self._results.get(normalize_query(query))
+            if results is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return results
+
+    def put(self, query, results):
+        # Empty results are usually an upstream error: don't pin them for the TTL
+        if results:
+            with self._lock:
+                self._results[normalize_query(query)] = list(results)
+
+    def search(self, query, compute):
+        """
+        Blocking lookup: returns cached results or runs `compute(query)` once
+        for all concurrent callers. `compute` returns (results, complete);
+        only complete results are cached.
+        """
+        key = normalize_query(query)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            leader = key not in self._sync_flights
+            if leader:
+                # [done event, leader's results]: followers share them even when they are not cached
+                self._sync_flights[key] = [threading.Event(), []]
+            else:
+                self.joined += 1
+            flight = self._sync_flights[key]
+
+        if not leader:
+            flight[0].wait()
+            return list(flight[1])
+
+        try:
+            results, complete = compute(query)
+            flight[1] = results
+            if complete:
+                self.put(key, results)
+            return results
+        finally:
+            with self._lock:
+                del self._sync_flights[key]
+            flight[0].set()
+
+    async def stream(self, query, produce):
+        """
+        Streaming lookup for async generators of (done, total, entry) like
+        scholar_api.stream_arxiv. A hit replays the cached entries at once;
+        a search already in flight is joined; otherwise `produce(query)` runs.
+        """
+        key = normalize_query(query)
+        cached = self.get(key)
+        if cached is not None:
+            for done, entry in enumerate(cached, 1):
+                yield done, len(cached), entry
+            return
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.ensure_future(
+                flight.run(produce(query), lambda f: self._land(key, f)))
+        else:
+            self.joined += 1
+
+        async with contextlib.aclosing(flight.follow()) as items:
+            async for item in items:
+                yield item
+
+    def _land(self, key, flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # A result without a review (Gemini throttled or failed) must not be pinned for the TTL
+        if flight.completed and all(entry for _, _, entry in flight.items):
+            self.put(key, [entry for _, _, entry in flight.items])
+
+    def stats(self):
+        with self._lock:
+            self._results.expire()
+            lookups = self.hits + self.misses
+            approx_bytes = sum(len(json.dumps(v, default=str)) for v in self._results.values())
+            return {
+                "entries": len(self._results),
+                "max_entries": self._results.maxsize,
+                "ttl_seconds": self._results.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "joined_in_flight": self.joined,
+                "in_flight": len(self._flights) + len(self._sync_flights),
+                "approx_bytes": approx_bytes,
+            }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"   🔎 Search cache: {s['hits']} hits / {s['misses']} misses "
+              f"({s['hit_rate']:.0%}), {s['joined_in_flight']} joined in flight, "
+              f"{s['entries']} entries (~{s['approx_bytes'] / 1024:.0f} KiB)")
+
+
+SEARCHES = SearchCache()
@@ -48,3 +48,47 @@ TOPIC_HUBS = {
 # Flattened list for the "Scout" script to iterate through
 ALL_TOPICS = list(
     set([topic for group in TOPIC_HUBS.values() for topic in group]))
+
+# arXiv categories (or whole archives, e.g. "astro-ph") whose new listings belong
+# to a topic, for the OAI-PMH harvest in arxiv_harvest.py. Topics without a clear
+# arXiv home (medicine, most engineering) are only scouted through Semantic Scholar.
+ARXIV_CATEGORY_TOPICS = {
+    "cs.AI": ["Artificial Intelligence"],
+    "cs.LG": ["Artificial Intelligence", "Data Science"],
+    "cs.CL": ["Artificial Intelligence"],
+    "cs.CV": ["Artificial Intelligence"],
+    "cs.NE": ["Artificial Intelligence"],
+    "cs.MA": ["Artificial Intelligence"],
+    "stat.ML": ["Data Science"],
+    "cs.DB": ["Data Science"],
+    "cs.IR": ["Data Science"],
+    "stat.AP": ["Data Science"],
+    "cs.CR": ["Cybersecurity"],
+    "quant-ph": ["Quantum Computing"],
+    "cs.SE": ["Software Engineering"],
+    "cs.RO": ["Robotics"],
+    "eess.SP": ["Electrical Engineering"],
+    "eess.SY": ["Electrical Engineering"],
+    "physics.med-ph": ["Biomedical Engineering"],
+    "q-bio.GN": ["Bioinformatics"],
+    "q-bio.QM": ["Bioinformatics"],
+    "q-bio.MN": ["Bioinformatics", "Molecular Biology"],
+    "q-bio.BM": ["Biochemistry", "Molecular Biology"],
+    "q-bio.SC": ["Molecular Biology"],
+    "q-bio.CB": ["Biology"],
+    "q-bio.PE": ["Biology"],
+    "q-bio.NC": ["Neuroscience"],
+    "hep-th": ["Physics"],
+    "hep-ph": ["Physics"],
+    "gr-qc": ["Physics"],
+    "physics.optics": ["Physics"],
+    "physics.atom-ph": ["Physics"],
+    "physics.chem-ph": ["Chemistry"],
+    "cond-mat.mtrl-sci": ["Material Science"],
+    "physics.plasm-ph": ["Nuclear Fusion"],
+    "nucl-th": ["Nuclear Physics"],
+    "nucl-ex": ["Nuclear Physics"],
+    "astro-ph": ["Astronomy"],
+    "physics.ao-ph": ["Climatology"],
+    "physics.geo-ph": ["Environmental Science"],
+}
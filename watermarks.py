@@ -0,0 +1,123 @@
+import datetime
+import json
+import os
+import threading
+import database
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# --- CONFIGURATION ---
+# Used when the scout_watermarks table is unavailable (local runs without Supabase)
+WATERMARK_STATE_PATH = os.getenv(
+    "WATERMARK_STATE_PATH", ".cache/watermarks.json")
+# First run for a topic: how far back to start reading
+WATERMARK_BOOTSTRAP_DAYS = int(os.getenv("WATERMARK_BOOTSTRAP_DAYS", "14"))
+# Never fall further behind than this; older unread papers are skipped
+WATERMARK_MAX_LAG_DAYS = int(os.getenv("WATERMARK_MAX_LAG_DAYS", "60"))
+# A topic with more unread papers than this many runs can read skips ahead to the newest ones
+WATERMARK_BACKLOG_RUNS = int(os.getenv("WATERMARK_BACKLOG_RUNS", "5"))
+
+_file_lock = threading.Lock()
+
+
+class Watermark:
+    """
+    High-watermark for one topic: the newest publication date examined,
+    plus the paperIds already examined at exactly that date (S2 dates have
+    day granularity, so the next run re-reads that day and skips them).
+    """
+
+    def __init__(self, topic, newest_date=None, seen_ids=None):
+        self.topic = topic
+        self.newest_date = newest_date
+        self.seen_ids = set(seen_ids or [])
+        self.examined = 0
+
+    def since(self):
+        """Date (YYYY-MM-DD) the next query should start from."""
+        today = datetime.date.today()
+        floor = (today - datetime.timedelta(days=WATERMARK_MAX_LAG_DAYS)).isoformat()
+        if not self.newest_date:
+            return (today - datetime.timedelta(days=WATERMARK_BOOTSTRAP_DAYS)).isoformat()
+        if self.newest_date < floor:
+            print(f"   ⏳ '{self.topic}' is more than {WATERMARK_MAX_LAG_DAYS} days behind "
+                  f"({self.newest_date}): papers before {floor} are skipped.")
+            return floor
+        return self.newest_date
+
+    def skip_backlog(self, newest_dates, total, per_run):
+        """
+        Catches a busy topic up. `newest_dates` are the publication dates of
+        the papers since since(), newest first, out of `total`. When more
+        than WATERMARK_BACKLOG_RUNS runs of `per_run` papers are waiting, the
+        watermark jumps to the oldest date it can still read, so the scout
+        stays recent instead of crawling through a backlog it never clears.
+        Returns the new start date, or None if nothing was skipped.
+        """
+        keep = per_run * WATERMARK_BACKLOG_RUNS
+        if total <= keep or not newest_dates:
+            return None
+        cutoff = newest_dates[min(keep, len(newest_dates)) - 1]
+        if self.newest_date and cutoff <= self.newest_date:
+            return None
+        print(f"   ⏩ '{self.topic}' has {total} unread papers, more than {WATERMARK_BACKLOG_RUNS} runs "
+              f"can read: skipping to {cutoff}.")
+        self.newest_date = cutoff
+        self.seen_ids = set()
+        return cutoff
+
+    def is_seen(self, paper):
+        date = paper.get('publicationDate')
+        if not date or not self.newest_date:
+            return False
+        return date < self.newest_date or (
+            date == self.newest_date and paper.get('paperId') in self.seen_ids)
+
+    def advance(self, paper):
+        """Moves the watermark past a paper that has been dealt with."""
+        self.examined += 1
+        date = paper.get('publicationDate')
+        if not date:
+            return
+        if not self.newest_date or date > self.newest_date:
+            self.newest_date = date
+            self.seen_ids = set()
+        if date == self.newest_date and paper.get('paperId'):
+            self.seen_ids.add(paper['paperId'])
+
+
+def _load_file():
+    if not os.path.exists(WATERMARK_STATE_PATH):
+        return {}
+    with open(WATERMARK_STATE_PATH) as f:
+        return json.load(f)
+
+
+def load_all():
+    """Returns {topic: Watermark} from Supabase, falling back to the local state file."""
+    rows = database.get_scout_watermarks()
+    if rows is None:
+        with _file_lock:
+            rows = _load_file()
+    return {topic: Watermark(topic, row.get('newest_date'), row.get('seen_ids'))
+            for topic, row in rows.items()}
+
+
+def save(mark):
+    if not mark.newest_date:
+        return
+    seen_ids = sorted(mark.seen_ids)
+    if database.save_scout_watermark(mark.topic, mark.newest_date, seen_ids):
+        return
+
+    with _file_lock:
+        state = _load_file()
+        state[mark.topic] = {"newest_date": mark.newest_date, "seen_ids": seen_ids}
+        folder = os.path.dirname(WATERMARK_STATE_PATH)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = f"{WATERMARK_STATE_PATH}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, WATERMARK_STATE_PATH)
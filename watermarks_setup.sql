@@ -0,0 +1,10 @@
+-- Per-topic ingestion high-watermarks for the nightly scout (safe to re-run)
+create table if not exists scout_watermarks (
+  topic text primary key,
+  newest_date date not null,              -- newest publicationDate examined
+  seen_ids text[] not null default '{}',  -- S2 paperIds already examined AT newest_date
+  updated_at timestamp with time zone default now()
+);
+
+-- Only the service role (the scout) reads or writes watermarks
+alter table scout_watermarks enable row level security;